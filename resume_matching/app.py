@@ -1,116 +1,119 @@
 import os
 import json
-import io
-import sqlite3
-import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
 from llama_cloud_services import LlamaExtract
-from pydantic import BaseModel
-from typing import List, Optional
 from llama_cloud.core.api_error import ApiError
 import os
 import tempfile
 import json
 import re
+import time
+import hashlib
 from pathlib import Path
+from resume_index import update_index
+from resume_schema import Resume
+from db import (
+    create_database, save_candidates, get_known_pdfs, get_candidates, count_candidates,
+    iter_candidates, list_skills, list_locations, data_version, delete_candidate_by_email
+)
+from exports import export_csv, export_excel
+from extraction import (
+    CloudExtractor, FallbackExtractor, extract_concurrently, throughput_report,
+    DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+)
+from local_extractor import LocalExtractor, DEFAULT_MIN_COVERAGE
+
+LOCAL_WITH_FALLBACK = f"{LocalExtractor.name} → {CloudExtractor.name}"
+
+# Nombre de CVs extraits écrits en base par transaction
+DB_WRITE_BATCH = 25
+
+# Choix du nombre de candidats affichés par page
+PAGE_SIZES = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
 
 # Load environment variables
 load_dotenv()
 api_key = os.environ["LLAMA_CLOUD_API_KEY"]
 llama_extract = LlamaExtract()
 
-# -------------------- Data Schema --------------------
-class TechnicalSkills(BaseModel):
-    programming_languages: List[str]
-    frameworks: List[str]
-    skills: List[str]
-
-class Experience(BaseModel):
-    company: str
-    title: str
-    description: Optional[str]
-    start_date: Optional[str]
-    end_date: Optional[str]
-
-class Education(BaseModel):
-    institution: str
-    degree: str
-    start_date: Optional[str]
-    end_date: Optional[str]
-
-class Resume(BaseModel):
-    name: str
-    phone: str
-    email: str
-    links: List[str]
-    experience: List[Experience]
-    education: List[Education]
-    technical_skills: TechnicalSkills
-    key_accomplishments: str
-    certifications: List[str]
-    projects: List[str]
-    languages: List[str]
-    interests: List[str]
-    hobbies: List[str]
-    awards: List[str]
-    volunteer_experience: List[str]
-    references: List[str]
-    summary: str
-    location: str
-
-# -------------------- Database Functions --------------------
-def create_database():
-    conn = sqlite3.connect("cvs.db")
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS candidates (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT UNIQUE,
-            phone TEXT,
-            json_data TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# -------------------- Llama Agent --------------------
+AGENT_NAME = "resume-screening"
 
-def save_to_database(name, email, phone, json_data):
-    conn = sqlite3.connect("cvs.db")
-    c = conn.cursor()
-    try:
-        c.execute("INSERT INTO candidates (name, email, phone, json_data) VALUES (?, ?, ?, ?)",
-                  (name, email, phone, json_data))
-    except sqlite3.IntegrityError:
-        st.warning(f"⚠️ Le candidat avec l'email {email} existe déjà.")
-    conn.commit()
-    conn.close()
-
-def get_all_candidates():
-    conn = sqlite3.connect("cvs.db")
-    c = conn.cursor()
-    c.execute("SELECT name, email, phone, json_data FROM candidates")
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-def delete_candidate_by_email(email):
-    conn = sqlite3.connect("cvs.db")
-    c = conn.cursor()
-    c.execute("DELETE FROM candidates WHERE email = ?", (email,))
-    conn.commit()
-    conn.close()
 
-# -------------------- Llama Agent --------------------
-def initialize_agent():
+# Function to fingerprint the extraction schema (the agent only has to change when it does)
+def schema_hash():
+    schema = json.dumps(Resume.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:12]
+
+
+# One agent per process and per schema version, reused across reruns and sessions
+@st.cache_resource(show_spinner="Préparation de l'agent LlamaExtract...")
+def initialize_agent(version):
+    start_time = time.time()
+    name = f"{AGENT_NAME}-{version}"
     try:
-        existing_agent = llama_extract.get_agent(name="resume-screening")
-        if existing_agent:
-            llama_extract.delete_agent(existing_agent.id)
+        agent = llama_extract.get_agent(name=name)
     except ApiError as e:
         if e.status_code != 404:
             raise
-    return llama_extract.create_agent(name="resume-screening", data_schema=Resume)
+        agent = None
+    if agent is None:
+        # Agents created for an older version of the schema are removed
+        for stale in llama_extract.list_agents():
+            if stale.name == AGENT_NAME or stale.name.startswith(f"{AGENT_NAME}-"):
+                llama_extract.delete_agent(stale.id)
+        agent = llama_extract.create_agent(name=name, data_schema=Resume)
+    return agent, time.time() - start_time
+
+
+# Function to get the cached agent and report cold/warm start times
+def get_agent():
+    start_time = time.time()
+    agent, cold_seconds = initialize_agent(schema_hash())
+    seconds = time.time() - start_time
+    if seconds >= cold_seconds:
+        st.caption(f"🤖 Agent {agent.name} prêt · démarrage à froid {cold_seconds:.2f} s")
+    else:
+        st.caption(f"🤖 Agent {agent.name} réutilisé · démarrage à chaud {seconds * 1000:.1f} ms (à froid : {cold_seconds:.2f} s)")
+    return agent
+
+# -------------------- Extraction Results --------------------
+def save_json_file(data_dict):
+    clean_name = re.sub(r'[^\w\-_.]', '_', data_dict.get("name", ""))
+    json_filename = clean_name + ".json"
+    json_path = os.path.join("parsed_json", json_filename)
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data_dict, f, indent=2, ensure_ascii=False)
+
+def flush_extractions(pending):
+    """Écrit les CVs extraits en attente (et l'empreinte de leur PDF) en une seule transaction."""
+    if not pending:
+        return
+    duplicates = save_candidates([resume for resume, _ in pending], [pdf_hash for _, pdf_hash in pending])
+    for email in duplicates:
+        st.warning(f"⚠️ Le candidat avec l'email {email} existe déjà.")
+    pending.clear()
+
+# Options des filtres, recalculées seulement quand la table des candidats change
+@st.cache_data(show_spinner=False)
+def filter_options(version):
+    return list_skills(), list_locations()
+
+def show_throughput(report, skipped=0):
+    st.subheader("📊 Débit de l'extraction")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Fichiers extraits", f"{report['ok']}/{report['files']}")
+    col2.metric("Extractions évitées", skipped)
+    col3.metric("Durée totale", f"{report['duration_s']} s")
+    col4.metric("Débit", f"{report['files_per_min']} CV/min")
+    col5.metric("Concurrence effective", f"{report['concurrency']}×")
+    st.caption(
+        f"Latence par fichier : moyenne {report['mean_s']} s · p95 {report['p95_s']} s · "
+        f"{report['errors']} erreur(s) · {report['timeouts']} dépassement(s) de délai"
+    )
 
 # -------------------- Streamlit App --------------------
 def main():
@@ -118,7 +121,22 @@ def main():
     st.title("📄 CV Parser")
 
     create_database()
-    agent = initialize_agent()
+
+    st.sidebar.header("⚙️ Paramètres d'extraction")
+    extractor_choice = st.sidebar.selectbox(
+        "Extracteur",
+        [LOCAL_WITH_FALLBACK, CloudExtractor.name],
+        help=(
+            "Local (pypdf) lit le texte du PDF sur la machine et n'envoie au cloud que les CVs mal couverts "
+            "(PDF scannés, mise en page inhabituelle)."
+        )
+    )
+    min_coverage = st.sidebar.slider(
+        "Couverture minimale pour l'extraction locale", min_value=0.0, max_value=1.0, value=DEFAULT_MIN_COVERAGE, step=0.1,
+        disabled=extractor_choice != LOCAL_WITH_FALLBACK
+    )
+    max_workers = st.sidebar.slider("Extractions simultanées", min_value=1, max_value=16, value=DEFAULT_MAX_WORKERS)
+    timeout = st.sidebar.number_input("Délai maximal par fichier (s)", min_value=10, max_value=1800, value=DEFAULT_TIMEOUT, step=10)
 
     st.subheader("📂 Charger un dossier contenant des CVs (PDF)")
 
@@ -135,92 +153,137 @@ def main():
             with tempfile.TemporaryDirectory() as temp_dir:
                 os.makedirs("parsed_json", exist_ok=True)
 
-                # Sauvegarder les fichiers localement pour traitement
-                for uploaded_file in uploaded_files:
+                # Empreinte SHA-256 de chaque PDF : un fichier déjà analysé n'est pas ré-extrait
+                file_hashes = [hashlib.sha256(uploaded_file.getbuffer()).hexdigest() for uploaded_file in uploaded_files]
+                known_pdfs = get_known_pdfs(set(file_hashes))
+                pdf_hashes = {}
+                skipped = 0
+
+                # Sauvegarder localement les fichiers à traiter
+                for uploaded_file, file_hash in zip(uploaded_files, file_hashes):
+                    if file_hash in known_pdfs:
+                        save_json_file(json.loads(known_pdfs[file_hash]))
+                        st.info(f"♻️ {uploaded_file.name} déjà analysé, résultat réutilisé.")
+                        skipped += 1
+                        continue
+                    if file_hash in pdf_hashes.values():
+                        st.info(f"♻️ {uploaded_file.name} est identique à un autre fichier du lot.")
+                        skipped += 1
+                        continue
                     file_path = os.path.join(temp_dir, uploaded_file.name)
                     with open(file_path, "wb") as f:
                         f.write(uploaded_file.getbuffer())
+                    pdf_hashes[Path(file_path)] = file_hash
 
-                pdf_files = list(Path(temp_dir).glob("*.pdf"))
+                pdf_files = [path for path in pdf_hashes if path.suffix.lower() == ".pdf"]
 
-                if not pdf_files:
+                if not pdf_files and not skipped:
                     st.warning("Aucun fichier PDF valide trouvé.")
                 else:
-                    with st.spinner("⏳ Traitement des fichiers..."):
-                        for pdf_path in pdf_files:
+                    if not pdf_files:
+                        extractor = None
+                    elif extractor_choice == CloudExtractor.name:
+                        extractor = CloudExtractor(get_agent())
+                    else:
+                        extractor = FallbackExtractor(LocalExtractor(min_coverage=min_coverage), CloudExtractor(get_agent()))
+
+                    progress_bar = st.progress(0.0)
+                    start_time = time.time()
+                    records = []
+                    pending = []
+
+                    # Chaque résultat est enregistré dès qu'il arrive (JSON immédiatement, base par lots)
+                    for pdf_path, result_data, error, seconds in extract_concurrently(pdf_files, extractor, max_workers, timeout):
+                        status = "ok"
+                        if error is None:
                             try:
-                                result = agent.extract(str(pdf_path))
-                                data = Resume(**result.data)
-
-                                # Sauvegarde en base de données
-                                save_to_database(data.name, data.email, data.phone, json.dumps(result.data))
-
-                                # Sauvegarde au format JSON
-                                clean_name = re.sub(r'[^\w\-_.]', '_', data.name)
-                                json_filename = clean_name + ".json"
-                                json_path = os.path.join("parsed_json", json_filename)
-
-                                with open(json_path, "w", encoding="utf-8") as f:
-                                    json.dump(result.data, f, indent=2, ensure_ascii=False)
-
-                                st.success(f"✅ {pdf_path.name} traité avec succès.")
-
+                                data = Resume(**result_data)
+                                save_json_file(result_data)
+                                pending.append((result_data, (pdf_hashes[pdf_path], data.email, pdf_path.name)))
+                                if len(pending) >= DB_WRITE_BATCH:
+                                    flush_extractions(pending)
+                                st.success(f"✅ {pdf_path.name} traité avec succès ({seconds:.1f} s).")
                             except Exception as e:
+                                status = "error"
                                 st.warning(f"❌ Erreur avec {pdf_path.name} : {str(e)}")
-
-                    st.success("🎉 Extraction terminée pour tous les fichiers.")
+                        elif isinstance(error, TimeoutError):
+                            status = "timeout"
+                            st.warning(f"⏱️ {pdf_path.name} abandonné : aucun résultat après {timeout} s.")
+                        else:
+                            status = "error"
+                            st.warning(f"❌ Erreur avec {pdf_path.name} : {str(error)}")
+                        records.append((seconds, status))
+                        progress_bar.progress(len(records) / len(pdf_files))
+                    flush_extractions(pending)
+
+                    show_throughput(throughput_report(records, time.time() - start_time), skipped)
+                    if isinstance(extractor, FallbackExtractor):
+                        st.caption(
+                            f"🖥️ {extractor.counts['primary']} CV(s) extrait(s) localement · "
+                            f"☁️ {extractor.counts['fallback']} envoyé(s) au cloud (couverture insuffisante)"
+                        )
+
+                    # Mise à jour incrémentale de l'index de pré-filtrage
+                    index = update_index("parsed_json")
+                    st.success(f"🎉 Extraction terminée pour tous les fichiers. ({len(index.docs)} CVs indexés)")
 
     st.subheader("📋 Liste des candidats")
-    candidates = get_all_candidates()
-    search = st.text_input("🔎 Rechercher par nom ou email")
+
+    # Filtres appliqués en SQL sur les tables indexées
+    skill_options, location_options = filter_options(data_version())
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        skill_filter = st.multiselect("🛠️ Compétences", skill_options)
+    with col2:
+        location_filter = st.multiselect("📍 Localisation", location_options)
+    with col3:
+        min_years = st.number_input("Années d'expérience min.", min_value=0.0, max_value=50.0, value=0.0, step=1.0)
+
+    search = st.text_input("🔎 Rechercher (nom, email, résumé, compétences, expérience, projets)")
+
+    # Recherche plein texte (FTS5, classée par bm25) et filtres exécutés en SQL ;
+    # seules les lignes de la page affichée sont lues et décodées
+    filters = dict(search=search, skills=skill_filter, locations=location_filter, min_years=min_years)
+    start_time = time.time()
+    total = count_candidates(**filters)
+    col1, col2 = st.columns([1, 1])
+    with col2:
+        page_size = st.selectbox("Candidats par page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+    page_count = max(1, (total + page_size - 1) // page_size)
+    with col1:
+        page = st.number_input(f"Page (sur {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+    candidates = get_candidates(**filters, limit=page_size, offset=(page - 1) * page_size)
+    st.caption(f"{total} candidat(s) trouvé(s) en {(time.time() - start_time) * 1000:.0f} ms")
 
     if candidates:
-        for i, (name, email, phone, json_data) in enumerate(candidates):
-            if search.lower() in name.lower() or search.lower() in email.lower() or search == "":
-                try:
-                    resume_dict = json.loads(json_data)
-                    with st.expander(f"👤 {name} | 📧 {email}"):
-                        col1, col2 = st.columns([4, 1])
-                        with col1:
-                            st.markdown(f"- **Téléphone** : {phone}")
-                            st.markdown(f"- **Localisation** : {resume_dict.get('location', '')}")
-                            st.markdown(f"- **Résumé** : {resume_dict.get('summary', '')}")
-                            st.markdown(f"- **Compétences** : {', '.join(resume_dict.get('technical_skills', {}).get('skills', []))}")
-                        with col2:
-                            if st.button(f"🗑️ Supprimer", key=f"delete_{i}"):
-                                delete_candidate_by_email(email)
-                                st.experimental_rerun()
-                except:
-                    continue
-
-        # Export CSV
-        filtered_data = [
-            {
-                "Name": name,
-                "Email": email,
-                "Phone": phone,
-                "Location": json.loads(json_data).get("location", ""),
-                "Summary": json.loads(json_data).get("summary", ""),
-                "Skills": ", ".join(json.loads(json_data).get("technical_skills", {}).get("skills", [])),
-            }
-            for name, email, phone, json_data in candidates
-            if search.lower() in name.lower() or search.lower() in email.lower() or search == ""
-        ]
-        df = pd.DataFrame(filtered_data)
-
-        if not df.empty:
-            st.subheader("📤 Exporter les résultats")
-            csv_buffer = io.StringIO()
-            df.to_csv(csv_buffer, index=False)
-            st.download_button("⬇️ Télécharger CSV", csv_buffer.getvalue(), "candidats.csv", "text/csv")
-
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Candidats')
-            excel_buffer.seek(0)
+        for name, email, phone, location, summary, years_experience, skills in candidates:
+            with st.expander(f"👤 {name} | 📧 {email}"):
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.markdown(f"- **Téléphone** : {phone}")
+                    st.markdown(f"- **Localisation** : {location}")
+                    st.markdown(f"- **Expérience** : {years_experience or 0:g} an(s)")
+                    st.markdown(f"- **Résumé** : {summary}")
+                    st.markdown(f"- **Compétences** : {skills or ''}")
+                with col2:
+                    if st.button(f"🗑️ Supprimer", key=f"delete_{email}"):
+                        delete_candidate_by_email(email)
+                        st.rerun()
+
+        # Les fichiers ne sont générés qu'au clic, par blocs de lignes écrits sur disque
+        st.subheader("📤 Exporter les résultats")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                f"⬇️ Télécharger CSV ({total} candidats)",
+                lambda: export_csv(iter_candidates(**filters)),
+                "candidats.csv",
+                "text/csv"
+            )
+        with col2:
             st.download_button(
-                "⬇️ Télécharger Excel",
-                excel_buffer,
+                f"⬇️ Télécharger Excel ({total} candidats)",
+                lambda: export_excel(iter_candidates(**filters)),
                 "candidats.xlsx",
                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
@@ -228,4 +291,4 @@ def main():
         st.info("ℹ️ Aucun CV trouvé.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
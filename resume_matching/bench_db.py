@@ -0,0 +1,167 @@
+"""Benchmark insert and query throughput of the cvs.db access layer (db.py) against per-call connections.
+
+    python bench_db.py --candidates 100000
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import db
+
+FIRST_NAMES = ["Anne", "James", "Pearl", "Rahul", "Jessica", "Alexander", "Mahdi", "London", "Iheb", "Ryan", "Corrinda", "Sarah"]
+LAST_NAMES = ["Frank", "Clark", "Kreig", "Khanna", "Lowski", "Jones", "Scott", "Chekir", "Oreilly", "Taieb", "Andoh", "Martin"]
+LOCATIONS = ["Tunis, Tunisia", "Paris, France", "Pune, India", "Austin, USA"]
+SKILLS = ["Python", "SQL", "Docker", "PyTorch", "LangChain", "React", "Java", "Kubernetes", "AWS", "Pandas", "FastAPI", "Spark"]
+
+
+def synthetic_candidates(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        email = f"candidate{i}@example.com"
+        start_year = rng.randint(2005, 2023)
+        rows.append({
+            "name": name,
+            "email": email,
+            "phone": f"+216 {rng.randint(10000000, 99999999)}",
+            "location": rng.choice(LOCATIONS),
+            "summary": "Engineer with experience in data and machine learning systems. " * 4,
+            "technical_skills": {"programming_languages": [], "frameworks": [], "skills": rng.sample(SKILLS, 5)},
+            "experience": [{
+                "company": f"Company {rng.randint(1, 500)}",
+                "title": "Engineer",
+                "description": "Built pipelines. " * 10,
+                "start_date": f"Jan {start_year}",
+                "end_date": "Present"
+            }],
+            "education": [{"institution": "University of Tunis", "degree": "Engineering", "start_date": "2000", "end_date": "2005"}]
+        })
+    return rows
+
+
+def rate(count, seconds):
+    return f"{count / seconds:,.0f}/s" if seconds > 0 else "inf"
+
+
+def legacy_insert(path, resumes):
+    """One connection and one commit per row, as app.py used to do."""
+    for resume in resumes:
+        row = (resume["name"], resume["email"], resume["phone"], json.dumps(resume))
+        conn = sqlite3.connect(path)
+        c = conn.cursor()
+        try:
+            c.execute("INSERT INTO candidates (name, email, phone, json_data) VALUES (?, ?, ?, ?)", row)
+        except sqlite3.IntegrityError:
+            pass
+        conn.commit()
+        conn.close()
+
+
+def legacy_lookup(path, email):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT name, email, phone, json_data FROM candidates WHERE email = ?", (email,))
+    row = c.fetchone()
+    conn.close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=100_000)
+    parser.add_argument("--legacy-rows", type=int, default=2_000, help="rows inserted the old way (it is slow)")
+    parser.add_argument("--batch", type=int, default=1_000, help="rows per save_candidates transaction")
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = synthetic_candidates(args.candidates)
+    rng = random.Random(1)
+    emails = [rng.choice(rows)["email"] for _ in range(args.lookups)]
+    prefixes = [rng.choice(FIRST_NAMES)[:3] for _ in range(args.lookups // 10)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE candidates (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, email TEXT UNIQUE, phone TEXT, json_data TEXT)")
+        conn.close()
+
+        start = time.time()
+        legacy_insert(legacy_path, rows[:args.legacy_rows])
+        legacy_insert_s = time.time() - start
+
+        start = time.time()
+        for email in emails[:args.lookups // 10]:
+            legacy_lookup(legacy_path, email)
+        legacy_lookup_s = time.time() - start
+
+        db.DB_PATH = os.path.join(temp_dir, "cvs.db")
+        db.create_database()
+
+        start = time.time()
+        for i in range(0, len(rows), args.batch):
+            db.save_candidates(rows[i:i + args.batch])
+        insert_s = time.time() - start
+
+        start = time.time()
+        for email in emails:
+            db.get_candidate_by_email(email)
+        lookup_s = time.time() - start
+
+        start = time.time()
+        for prefix in prefixes:
+            db.find_candidates_by_name(prefix)
+        prefix_s = time.time() - start
+
+        start = time.time()
+        all_rows = db.get_candidates()
+        scan_s = time.time() - start
+
+        filters = [
+            ("skill", {"skills": ["Docker"]}),
+            ("2 skills", {"skills": ["Docker", "Spark"]}),
+            ("location", {"locations": ["Pune, India"]}),
+            ("years >= 15", {"min_years": 15}),
+            ("skill + location + years", {"skills": ["PyTorch"], "locations": ["Tunis, Tunisia"], "min_years": 10})
+        ]
+        searches = ["docker", "pyt", "rahul khanna", "candidate4242@example.com", "docker spark"]
+        for text in searches:
+            filters.append((f'search "{text}" (page of 50)', {"search": text, "limit": 50}))
+            filters.append((f'search "{text}" (count)', {"search": text, "count": True}))
+        filter_results = []
+        for label, kwargs in filters:
+            if kwargs.pop("count", False):
+                start = time.time()
+                count = db.count_candidates(**kwargs)
+                filter_results.append((label, count, time.time() - start))
+                continue
+            start = time.time()
+            matched = db.get_candidates(**kwargs)
+            filter_results.append((label, len(matched), time.time() - start))
+        # The search box used to load every row and test substrings in Python
+        start = time.time()
+        needle = "rahul"
+        legacy_matches = [
+            row for row in db.query("SELECT name, email, phone, json_data FROM candidates")
+            if needle in row[0].lower() or needle in row[1].lower()
+        ]
+        legacy_search_s = time.time() - start
+        db.close_connection()
+
+    print(f"{args.candidates:,} candidates")
+    print(f"insert  legacy (connect + commit per row): {rate(args.legacy_rows, legacy_insert_s)} over {args.legacy_rows:,} rows")
+    print(f"insert  db.py (executemany, {args.batch:,} rows per transaction, WAL): {rate(len(rows), insert_s)} "
+          f"({insert_s:.2f}s total)")
+    print(f"lookup by email  legacy: {rate(args.lookups // 10, legacy_lookup_s)} · db.py: {rate(len(emails), lookup_s)}")
+    print(f"name prefix search (LIMIT 50)  db.py: {rate(len(prefixes), prefix_s)}")
+    print(f"get_candidates (all)  db.py: {len(all_rows):,} rows in {scan_s:.2f}s")
+    for label, count, seconds in filter_results:
+        print(f"filter {label}: {count:,} rows in {seconds * 1000:.1f} ms")
+    print(f'legacy search "rahul" (load all rows + substring): {len(legacy_matches):,} rows in {legacy_search_s * 1000:.0f} ms')
+
+
+if __name__ == "__main__":
+    main()
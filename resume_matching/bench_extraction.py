@@ -0,0 +1,62 @@
+"""Benchmark the concurrent extraction stage with the local stub extractor (no network).
+
+    python bench_extraction.py --pdf-dir ../csv --copies 25 --workers 1 4 8 16 --latency 1.0
+    python bench_extraction.py --workers 1 --hung 1 --timeout 2    # timeout check: queued files still finish
+
+With --hung N the first N files never return; the run fails unless each of them times out
+and every other file is extracted.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+import pandas as pd
+from extraction import StubExtractor, extract_concurrently, throughput_report
+
+
+def run(pdf_paths, extractor, max_workers, timeout):
+    start = time.time()
+    records = []
+    for _, _, error, seconds in extract_concurrently(pdf_paths, extractor, max_workers, timeout):
+        status = "ok" if error is None else "timeout" if isinstance(error, TimeoutError) else "error"
+        records.append((seconds, status))
+    return throughput_report(records, time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf-dir", default="../csv")
+    parser.add_argument("--copies", type=int, default=1, help="repeat the PDF list to simulate a larger upload")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=1.0, help="mean simulated seconds per file")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=180)
+    parser.add_argument("--hung", type=int, default=0, help="number of files whose extraction never returns")
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.pdf_dir).glob("*.pdf"))
+    if not pdfs:
+        parser.error(f"no PDF found in {args.pdf_dir}")
+    # Distinct names per copy so every file gets its own simulated latency
+    pdf_paths = [p.with_name(f"{p.stem}_{i}.pdf") for i in range(args.copies) for p in pdfs]
+
+    extractor = StubExtractor(latency=args.latency, jitter=args.jitter, hung=[p.stem for p in pdf_paths[:args.hung]])
+    rows = []
+    for max_workers in args.workers:
+        report = run(pdf_paths, extractor, max_workers, args.timeout)
+        rows.append({"workers": max_workers, **report})
+
+    df = pd.DataFrame(rows).set_index("workers")
+    df["speedup"] = (df["duration_s"].iloc[0] / df["duration_s"]).round(2)
+    print(f"{len(pdf_paths)} files, {extractor.name}, {args.latency}s ± {args.jitter}s per file")
+    print(df.to_string())
+
+    if args.hung:
+        passed = (df["timeouts"] == args.hung).all() and (df["ok"] == len(pdf_paths) - args.hung).all()
+        print(f"timeout check: {'passed' if passed else 'FAILED'} ({args.hung} hung file(s), the others must all finish)")
+        if not passed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark the local PDF extractor against the stored cloud extractions (parsed_json/).
+
+    python bench_local_extraction.py --pdf-dir ../csv --json-dir ../parsed_json [--cloud]
+
+Per file: local parse time, coverage/confidence, whether the cloud fallback would be used and,
+when the candidate is found in parsed_json/, the field accuracy of the local result.
+"""
+import os
+import re
+import json
+import time
+import argparse
+from pathlib import Path
+import pandas as pd
+from local_extractor import parse_pdf, get_pool, LocalExtractor
+
+
+def normalize(value):
+    return " ".join(str(value or "").lower().split())
+
+
+def recall(reference, found):
+    """Share of the reference values found (case-insensitive). None when there is nothing to find."""
+    reference = {normalize(v) for v in reference if normalize(v)}
+    if not reference:
+        return None
+    found = {normalize(v) for v in found}
+    return len(reference & found) / len(reference)
+
+
+def all_skills(resume):
+    return [skill for values in (resume.get("technical_skills") or {}).values() for skill in values or []]
+
+
+def field_accuracy(local, reference):
+    """Per-field agreement (0-1) between a local extraction and the stored cloud extraction."""
+    return {
+        "name": float(normalize(local["name"]) == normalize(reference.get("name"))),
+        "email": float(normalize(local["email"]) == normalize(reference.get("email"))),
+        "phone": float(re.sub(r"\D", "", local["phone"]) == re.sub(r"\D", "", reference.get("phone") or "")),
+        "location": float(normalize(local["location"]) == normalize(reference.get("location"))),
+        "skills": recall(all_skills(reference), all_skills(local)),
+        "companies": recall([e.get("company") for e in reference.get("experience") or []], [e["company"] for e in local["experience"]]),
+        "institutions": recall([e.get("institution") for e in reference.get("education") or []], [e["institution"] for e in local["education"]]),
+        "languages": recall([l.split("(")[0] for l in reference.get("languages") or []], [l.split("(")[0] for l in local["languages"]])
+    }
+
+
+def load_references(json_dir):
+    """Stored extractions indexed by email and by name."""
+    references = {}
+    for path in Path(json_dir).glob("*.json"):
+        with open(path, "r", encoding="utf-8") as f:
+            resume = json.load(f)
+        for key in (resume.get("email"), resume.get("name")):
+            if normalize(key):
+                references[normalize(key)] = resume
+    return references
+
+
+def cloud_latencies(pdfs):
+    """Time LlamaExtract on the same files (needs LLAMA_CLOUD_API_KEY)."""
+    from llama_cloud_services import LlamaExtract
+    from resume_schema import Resume
+    from extraction import CloudExtractor
+
+    llama_extract = LlamaExtract()
+    agent = llama_extract.create_agent(name=f"resume-screening-bench-{int(time.time())}", data_schema=Resume)
+    try:
+        extractor = CloudExtractor(agent)
+        latencies = {}
+        for pdf in pdfs:
+            start = time.time()
+            extractor.extract(pdf)
+            latencies[pdf.name] = time.time() - start
+        return latencies
+    finally:
+        llama_extract.delete_agent(agent.id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf-dir", default="../csv")
+    parser.add_argument("--json-dir", default="../parsed_json")
+    parser.add_argument("--cloud", action="store_true", help="also time LlamaExtract on the same files")
+    args = parser.parse_args()
+
+    pdfs = sorted(Path(args.pdf_dir).glob("*.pdf"))
+    if not pdfs:
+        parser.error(f"no PDF found in {args.pdf_dir}")
+    references = load_references(args.json_dir)
+    extractor = LocalExtractor()
+
+    rows = []
+    for pdf in pdfs:
+        start = time.time()
+        data, quality = parse_pdf(str(pdf))
+        seconds = time.time() - start
+        accepted = (
+            quality["coverage"] >= extractor.min_coverage
+            and quality["confidence"] >= extractor.min_confidence
+            and not {"name", "email"} & set(quality["missing"])
+        )
+        reference = references.get(normalize(data["email"])) or references.get(normalize(data["name"]))
+        accuracy = field_accuracy(data, reference) if reference else {}
+        rows.append({
+            "file": pdf.name,
+            "local_s": round(seconds, 3),
+            "text_chars": quality["text_chars"],
+            "coverage": quality["coverage"],
+            "confidence": quality["confidence"],
+            "path": "local" if accepted else "cloud fallback",
+            **{f"acc_{field}": value for field, value in accuracy.items()}
+        })
+
+    df = pd.DataFrame(rows).set_index("file")
+    if args.cloud:
+        df["cloud_s"] = pd.Series(cloud_latencies(pdfs)).round(3)
+
+    # Throughput across cores (pool start-up excluded)
+    pool = get_pool()
+    list(pool.map(parse_pdf, [str(pdfs[0])]))
+    start = time.time()
+    list(pool.map(parse_pdf, [str(p) for p in pdfs]))
+    pool_seconds = time.time() - start
+
+    pd.set_option("display.width", 200)
+    print(df.to_string())
+    print()
+    print(f"{len(pdfs)} PDFs · {int((df['path'] == 'local').sum())} handled locally · "
+          f"{int((df['text_chars'] < 200).sum())} without a text layer")
+    print(f"local parse: mean {df['local_s'].mean():.3f}s per file sequential · "
+          f"{pool_seconds:.3f}s for all files on {os.cpu_count()} cores")
+    if args.cloud:
+        print(f"cloud extract: mean {df['cloud_s'].mean():.3f}s per file")
+    accuracy_columns = [c for c in df.columns if c.startswith("acc_")]
+    if accuracy_columns:
+        print("field accuracy vs parsed_json (files with a stored extraction):")
+        print(df[accuracy_columns].mean().round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Benchmark the Ollama models offered by the app on the job requirements and match prompts.
+
+    python bench_models.py --stub                     # built-in stub server (CI, no model needed)
+    python bench_models.py --models llama3:latest gemma:2b --repeats 3
+    python bench_models.py --compact                  # also measure the match prompt with compacted resumes
+
+Replays the generate_job_requirements prompt on fixed job titles and the match_resume_with_job
+prompt on the resumes of parsed_json/ against each model. Per model and prompt: latency percentiles,
+output tokens per second, JSON validity rate and, for matching, agreement of the match scores with
+the first model (Spearman's rho and mean absolute score difference).
+
+With --compact the match prompt is also run with resume_compact.compact_resume texts, and the
+measured change is reported per model: median latency and Ollama's prompt_eval_duration,
+compacted vs. indented JSON resumes.
+
+The stub answers /api/generate with deterministic, model-dependent outputs and reports simulated
+Ollama timings; it only sleeps --stub-time-scale of them, so its numbers exercise the harness
+and say nothing about the real models.
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pandas as pd
+import ollama_client
+from job_spec import parse_requirements, requirements_to_job_text
+from job_requirements import MODEL_OPTIONS, build_requirements_prompt, parse_requirements_output
+from match_prompts import build_match_prompt, extract_timings, score_result
+from resume_compact import estimate_tokens, compact_resume
+
+JOB_TITLES = ["Data Scientist", "AI Engineer", "Machine Learning Engineer", "Backend Developer", "Data Analyst"]
+MATCH_LEVELS = ["NONE", "PARTIAL", "NEAR FULL", "FULL"]
+
+# Stub model profiles: (prompt tokens/s, output tokens/s, load s, share of labels shifted, share of invalid outputs)
+STUB_PROFILES = {
+    "llama3:latest": (300, 25, 4.0, 0.0, 0.02),
+    "mistral:latest": (450, 35, 3.0, 0.15, 0.05),
+    "gemma:2b": (1200, 80, 1.0, 0.3, 0.1),
+}
+DEFAULT_STUB_PROFILE = (500, 40, 2.0, 0.2, 0.05)
+
+
+# -------------------- Stub Ollama server --------------------
+def prompt_section(prompt, heading):
+    match = re.search(rf"## {heading}:\n(.*?)(?=\n## |\Z)", prompt, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def requirement_ids(job_text):
+    """The "id" of each requirement entry, in parse_requirements item order (None when absent)."""
+    try:
+        categories = json.loads(job_text)["importance_weights"]
+        return [
+            entry.get("id") for entries in categories.values() for entry in entries or []
+            if isinstance(entry, dict) and (entry.get("skill") or entry.get("requirement"))
+        ]
+    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+        return []
+
+
+def stub_match_output(prompt, rng, noise):
+    """Match records whose level depends on how many words of the requirement appear in the resume.
+
+    Like a real model, the stub sometimes rewords a requirement (at the profile's noise rate)
+    and echoes the requirement ids when the job description has them.
+    """
+    resume_words = set(re.findall(r"\w+", prompt_section(prompt, "Resume Data").lower()))
+    job_text = prompt_section(prompt, "Job Description Data")
+    _, items = parse_requirements(job_text)
+    ids = requirement_ids(job_text)
+    records = []
+    for position, item in enumerate(items):
+        words = set(re.findall(r"\w+", item["label"].lower()))
+        level = round(3 * len(words & resume_words) / len(words)) if words else 0
+        if rng.random() < noise:
+            level = min(3, max(0, level + rng.choice([-1, 1])))
+        record = {
+            "requirement": item["label"] if rng.random() >= noise else f"{item['label']} skills",
+            "match": MATCH_LEVELS[level],
+            "evidence": "",
+            "source": "RESUME" if level else "Inference",
+            "importance": item["weight"]
+        }
+        if position < len(ids) and ids[position]:
+            record = {"id": ids[position], **record}
+        records.append(record)
+    return json.dumps(records, indent=2)
+
+
+def stub_requirements_output(prompt, rng):
+    title = re.search(r"for a (.*?) position", prompt)
+    words = re.findall(r"\w+", title.group(1)) if title else ["Role"]
+    weight = lambda: round(rng.uniform(0.4, 1.0), 2)
+    return json.dumps({
+        "job_type": " ".join(words),
+        "importance_weights": {
+            "Core skills": [{"skill": f"{word} fundamentals", "weight": weight()} for word in words],
+            "Technical skills": [{"skill": tool, "weight": weight()} for tool in ("Python", "SQL", "Git", "Docker")],
+            "Experience requirements": [{"requirement": f"3+ years as {' '.join(words)}", "weight": weight()}],
+            "Education requirements": [{"requirement": "Bachelor's degree in a related field", "weight": weight()}],
+            "Soft skills": [{"skill": skill, "weight": weight()} for skill in ("Communication", "Teamwork")]
+        }
+    }, indent=2)
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    time_scale = 0.01
+    loaded = set()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = payload.get("model", "").lower()
+        prompt = payload.get("prompt", "")
+        prompt_rate, output_rate, load, noise, invalid_rate = STUB_PROFILES.get(model, DEFAULT_STUB_PROFILE)
+        seed = hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+        rng = random.Random(seed)
+
+        if "## Resume Data:" in prompt:
+            output = stub_match_output(prompt, rng, noise)
+        elif prompt:
+            output = stub_requirements_output(prompt, rng)
+        else:
+            output = ""
+        if output and rng.random() < invalid_rate:
+            output = output[:len(output) // 2]
+
+        load_s = 0.0 if model in self.loaded else load
+        self.loaded.add(model)
+        prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(output)
+        prompt_s, output_s = prompt_tokens / prompt_rate, output_tokens / output_rate
+        total_s = load_s + prompt_s + output_s
+        time.sleep(total_s * self.time_scale)
+
+        body = json.dumps({
+            "model": model,
+            "response": output,
+            "done": True,
+            "total_duration": int(total_s * 1e9),
+            "load_duration": int(load_s * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_s * 1e9),
+            "eval_count": output_tokens,
+            "eval_duration": int(output_s * 1e9)
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(time_scale):
+    """Serve the stub on a free local port and point ollama_client at it."""
+    StubOllamaHandler.time_scale = time_scale
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ollama_client.OLLAMA_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+# -------------------- Benchmark --------------------
+def run_prompt(model, prompt, payload_options):
+    """One non-streamed /api/generate call. Returns (response text or None, timings)."""
+    start = time.time()
+    try:
+        response = ollama_client.post("/api/generate", {"model": model, "prompt": prompt, "stream": False, **payload_options})
+        response.raise_for_status()
+    except Exception:
+        return None, {"total_s": time.time() - start}
+    data = response.json()
+    return data.get("response", ""), extract_timings(data, time.time() - start)
+
+
+def valid_requirements(raw_output):
+    try:
+        requirements = parse_requirements_output(raw_output)
+        weights = requirements["importance_weights"]
+        values = [item["weight"] for items in weights.values() for item in items]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return False
+    return bool(values) and all(isinstance(v, (int, float)) and 0.0 <= v <= 1.0 for v in values)
+
+
+def summarize(model, task, calls):
+    """calls: list of (timings, valid)."""
+    latencies = pd.Series([timings["total_s"] for timings, _ in calls])
+    output_tokens = sum(timings.get("output_tokens", 0) for timings, _ in calls)
+    eval_seconds = sum(timings.get("eval_s", 0) for timings, _ in calls)
+    return {
+        "model": model,
+        "prompt": task,
+        "calls": len(calls),
+        "p50 (s)": round(latencies.quantile(0.5), 2),
+        "p90 (s)": round(latencies.quantile(0.9), 2),
+        "p99 (s)": round(latencies.quantile(0.99), 2),
+        "prompt eval (s)": round(sum(timings.get("prompt_eval_s", 0) for timings, _ in calls) / len(calls), 3),
+        "tokens/s": round(output_tokens / eval_seconds, 1) if eval_seconds else None,
+        "valid JSON": round(sum(valid for _, valid in calls) / len(calls), 3)
+    }
+
+
+def load_job_text(job_file, results_dir):
+    """A job_requirements.py export, or the requirements of the first stored match result."""
+    if job_file:
+        return Path(job_file).read_text(encoding="utf-8")
+    first = sorted(Path(results_dir).glob("*.json"))[0]
+    records = json.loads(first.read_text(encoding="utf-8"))
+    items = [
+        {"category": "Requirements", "key": "requirement", "label": r["requirement"], "weight": float(r.get("importance", r.get("weight")) or 0.0)}
+        for r in records if r.get("requirement")
+    ]
+    return requirements_to_job_text("Benchmark role", items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=list(MODEL_OPTIONS), help="the first one is the agreement reference")
+    parser.add_argument("--json-dir", default="../parsed_json")
+    parser.add_argument("--results-dir", default="../matching_results", help="source of the default job requirements")
+    parser.add_argument("--job-file", help="job requirements JSON exported from job_requirements.py")
+    parser.add_argument("--resumes", type=int, default=12)
+    parser.add_argument("--repeats", type=int, default=1, help="calls per (model, input)")
+    parser.add_argument("--stub", action="store_true", help="run against the built-in stub Ollama server")
+    parser.add_argument("--stub-time-scale", type=float, default=0.01, help="share of the simulated latency the stub sleeps")
+    parser.add_argument("--compact", action="store_true", help="also run the match prompt with compacted resumes")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.stub_time_scale) if args.stub else None
+    resume_jsons = {
+        path.name: json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted(Path(args.json_dir).glob("*.json"))[:args.resumes]
+    }
+    resumes = {name: json.dumps(resume, indent=2, ensure_ascii=False) for name, resume in resume_jsons.items()}
+    compact_resumes = {name: compact_resume(resume)[0] for name, resume in resume_jsons.items()}
+    job_text = load_job_text(args.job_file, args.results_dir)
+    keep_alive = {"keep_alive": "30m"}
+
+    rows = []
+    scores = {}
+    for model in args.models:
+        # Load time is reported apart so it does not land in the first call's latency
+        load_s = ollama_client.warm_up(model)
+        print(f"{model}: loaded in {load_s:.1f}s", flush=True)
+
+        calls = []
+        for title in JOB_TITLES:
+            for _ in range(args.repeats):
+                output, timings = run_prompt(model, build_requirements_prompt(title), {"format": "json", **keep_alive})
+                calls.append((timings, output is not None and valid_requirements(output)))
+        rows.append(summarize(model, "job requirements", calls))
+
+        calls = []
+        model_scores = {}
+        for name, resume_text in resumes.items():
+            for _ in range(args.repeats):
+                output, timings = run_prompt(model, build_match_prompt(resume_text, job_text), keep_alive)
+                score = score_result(output) if output is not None else None
+                calls.append((timings, score is not None))
+                if score is not None:
+                    model_scores.setdefault(name, []).append(score)
+        rows.append(summarize(model, "match", calls))
+        scores[model] = pd.Series({name: sum(values) / len(values) for name, values in model_scores.items()}, dtype=float)
+
+        if args.compact:
+            calls = []
+            for name, resume_text in compact_resumes.items():
+                for _ in range(args.repeats):
+                    output, timings = run_prompt(model, build_match_prompt(resume_text, job_text), keep_alive)
+                    calls.append((timings, output is not None and score_result(output) is not None))
+            rows.append(summarize(model, "match (compact)", calls))
+
+    if server:
+        server.shutdown()
+
+    report = pd.DataFrame(rows)
+    reference = args.models[0]
+    for model in args.models:
+        compared = pd.concat([scores[model], scores[reference]], axis=1, join="inner").dropna()
+        index = (report["model"] == model) & (report["prompt"] == "match")
+        if len(compared) >= 2:
+            # Spearman's rho is the Pearson correlation of the ranks
+            report.loc[index, "Spearman vs ref"] = round(compared[0].rank().corr(compared[1].rank()), 3)
+            report.loc[index, "mean |Δscore|"] = round((compared[0] - compared[1]).abs().mean(), 2)
+
+    pd.set_option("display.width", 200)
+    print()
+    print(f"{'stub server' if server else ollama_client.OLLAMA_URL} · {len(resumes)} resumes · "
+          f"{len(JOB_TITLES)} job titles · {args.repeats} repeat(s) · agreement reference: {reference}")
+    print(report.to_string(index=False))
+
+    if args.compact:
+        # Measured, not estimated: wall or Ollama-reported latency and prompt_eval_duration of both variants
+        print()
+        for model in args.models:
+            full = report[(report["model"] == model) & (report["prompt"] == "match")].iloc[0]
+            compact = report[(report["model"] == model) & (report["prompt"] == "match (compact)")].iloc[0]
+            print(
+                f"{model}: compaction changed median match latency {full['p50 (s)']:.2f}s → {compact['p50 (s)']:.2f}s, "
+                f"mean prompt eval {full['prompt eval (s)']:.3f}s → {compact['prompt eval (s)']:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
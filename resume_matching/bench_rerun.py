@@ -0,0 +1,114 @@
+"""Measure the database and export work of one rerun of the app.py candidate list at several table sizes.
+
+    python bench_rerun.py --sizes 1000 10000 100000
+
+"before" replays what the page used to do on every rerun: load every row, json.loads each blob,
+build the CSV and the Excel file in memory. "after" is the current rerun: data version, match count
+and one page of rows. Exports are now built only on click; their time and peak memory are measured
+separately. The export peak covers the export helpers only: it includes the returned file, which
+st.download_button then holds in memory in full, so it grows with the table. Streamlit rendering is
+not included (the old page also drew one expander per candidate).
+"""
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import pandas as pd
+import db
+from bench_db import synthetic_candidates
+from exports import export_csv, export_excel
+
+PAGE_SIZE = 25
+
+
+def legacy_rerun(search="", with_exports=True):
+    candidates = db.query("SELECT name, email, phone, json_data FROM candidates")
+    for name, email, phone, json_data in candidates:
+        if search.lower() in name.lower() or search.lower() in email.lower() or search == "":
+            resume_dict = json.loads(json_data)
+            resume_dict.get("location", ""), resume_dict.get("summary", "")
+    filtered_data = [
+        {
+            "Name": name,
+            "Email": email,
+            "Phone": phone,
+            "Location": json.loads(json_data).get("location", ""),
+            "Summary": json.loads(json_data).get("summary", ""),
+            "Skills": ", ".join(json.loads(json_data).get("technical_skills", {}).get("skills", [])),
+        }
+        for name, email, phone, json_data in candidates
+        if search.lower() in name.lower() or search.lower() in email.lower() or search == ""
+    ]
+    df = pd.DataFrame(filtered_data)
+    if with_exports:
+        csv_buffer = io.StringIO()
+        df.to_csv(csv_buffer, index=False)
+        excel_buffer = io.BytesIO()
+        with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Candidats")
+    return len(df)
+
+
+def current_rerun(search="", page=1):
+    db.data_version()
+    total = db.count_candidates(search=search)
+    rows = db.get_candidates(search=search, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+    return total, len(rows)
+
+
+def timed(function, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.time()
+        function(*args)
+        best = min(best, time.time() - start)
+    return best
+
+
+def peak_memory(function, *args):
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db.DB_PATH = os.path.join(temp_dir, "cvs.db")
+            db.create_database()
+            resumes = synthetic_candidates(size)
+            for i in range(0, size, 5_000):
+                db.save_candidates(resumes[i:i + 5_000])
+            del resumes
+
+            rows.append({
+                "candidates": size,
+                "before rerun (s)": round(timed(legacy_rerun, "", True, repeat=1), 3),
+                "before rerun, no exports (s)": round(timed(legacy_rerun, "", False), 3),
+                "after rerun (s)": round(timed(current_rerun), 4),
+                "after rerun, search (s)": round(timed(current_rerun, "docker"), 4),
+                "after rerun, last page (s)": round(timed(current_rerun, "", max(1, size // PAGE_SIZE)), 4),
+                "CSV export on click (s)": round(timed(lambda: export_csv(db.iter_candidates()), repeat=1), 2),
+                "Excel export on click (s)": round(timed(lambda: export_excel(db.iter_candidates()), repeat=1), 2),
+                "before exports peak (MB)": round(peak_memory(legacy_rerun), 1),
+                "CSV export peak, incl. file (MB)": round(peak_memory(lambda: export_csv(db.iter_candidates())), 1),
+                "Excel export peak, incl. file (MB)": round(peak_memory(lambda: export_excel(db.iter_candidates())), 1)
+            })
+            db.close_connection()
+
+    pd.set_option("display.width", 250)
+    print(pd.DataFrame(rows).set_index("candidates").T.to_string())
+
+
+if __name__ == "__main__":
+    main()
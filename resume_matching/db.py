@@ -0,0 +1,508 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "cvs.db"
+SCHEMA_VERSION = 4
+
+# Rows per IN (...) lookup, below SQLite's bound parameter limit
+LOOKUP_BATCH = 500
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",        # readers no longer block the writer
+    "PRAGMA synchronous=NORMAL",      # fsync at checkpoints only, safe with WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",       # 64 MB page cache
+    "PRAGMA mmap_size=268435456",     # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON"          # deleting a candidate deletes its skills, experience and education
+]
+
+_connections = {}
+_lock = threading.RLock()
+
+
+def get_connection():
+    """Process-wide connection to DB_PATH, opened once with the pragmas above.
+
+    Streamlit reruns on different threads, so the connection is shared across threads and
+    every use goes through _lock.
+    """
+    with _lock:
+        conn = _connections.get(DB_PATH)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly by transaction()
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            _connections[DB_PATH] = conn
+        return conn
+
+
+def close_connection():
+    with _lock:
+        conn = _connections.pop(DB_PATH, None)
+        if conn is not None:
+            conn.close()
+
+
+@contextmanager
+def transaction():
+    """Cursor inside a single BEGIN ... COMMIT, rolled back on error."""
+    with _lock:
+        c = get_connection().cursor()
+        c.execute("BEGIN")
+        try:
+            yield c
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        c.execute("COMMIT")
+
+
+def query(sql, params=()):
+    with _lock:
+        return get_connection().execute(sql, params).fetchall()
+
+
+# -------------------- Normalized Fields --------------------
+MONTHS = {
+    "jan": 1, "janv": 1, "feb": 2, "fév": 2, "fev": 2, "mar": 3, "mars": 3, "apr": 4, "avr": 4, "may": 5, "mai": 5,
+    "jun": 6, "juin": 6, "jul": 7, "juil": 7, "aug": 8, "aoû": 8, "aou": 8, "sep": 9, "sept": 9, "oct": 10,
+    "nov": 11, "dec": 12, "déc": 12
+}
+PRESENT_WORDS = ("present", "current", "now", "today", "aujourd", "présent", "en cours")
+
+
+def parse_month(text, end=False):
+    """Months since year 0 for "Jul 2024", "07/2024" or "2024" (December when only the year of an end date is known)."""
+    text = str(text or "").lower()
+    year = re.search(r"(19|20)\d{2}", text)
+    if not year:
+        return None
+    month = re.match(r"\s*(\d{1,2})/", text)
+    if month:
+        month = int(month.group(1))
+    else:
+        name = re.search(r"[a-zéû]+", text)
+        month = MONTHS.get(name.group(0)[:4], MONTHS.get(name.group(0)[:3])) if name else None
+    return int(year.group(0)) * 12 + ((month or (12 if end else 1)) - 1)
+
+
+def experience_years(experience, today=None):
+    """Total years covered by the experience date ranges, overlapping jobs counted once."""
+    today = today or time.localtime()
+    now = today.tm_year * 12 + today.tm_mon - 1
+    intervals = []
+    for job in experience or []:
+        start = parse_month(job.get("start_date"))
+        end_text = str(job.get("end_date") or "")
+        if start is None:
+            continue
+        if not end_text or any(word in end_text.lower() for word in PRESENT_WORDS):
+            end = now
+        else:
+            end = parse_month(end_text, end=True)
+        if end is not None and end >= start:
+            intervals.append((start, end + 1))
+
+    months = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return round(months / 12, 1)
+
+
+def candidate_row(resume):
+    """Values of the candidates table for one resume dict."""
+    return (
+        resume.get("name", ""),
+        resume.get("email", ""),
+        resume.get("phone", ""),
+        resume.get("location") or "",
+        resume.get("summary") or "",
+        experience_years(resume.get("experience")),
+        json.dumps(resume)
+    )
+
+
+def detail_rows(candidate_id, resume):
+    """(skills, experience, education) rows of one resume."""
+    skills, seen = [], set()
+    for category, values in (resume.get("technical_skills") or {}).items():
+        for skill in values or []:
+            skill = " ".join(str(skill).split())
+            # Deduplicated per category: the same skill may be listed under several of them
+            if skill and (skill.lower(), category) not in seen:
+                seen.add((skill.lower(), category))
+                skills.append((candidate_id, skill, category))
+    experience = [
+        (candidate_id, position, job.get("company") or "", job.get("title") or "", job.get("description") or "",
+         job.get("start_date"), job.get("end_date"))
+        for position, job in enumerate(resume.get("experience") or [])
+    ]
+    education = [
+        (candidate_id, position, school.get("institution") or "", school.get("degree") or "",
+         school.get("start_date"), school.get("end_date"))
+        for position, school in enumerate(resume.get("education") or [])
+    ]
+    return skills, experience, education
+
+
+def insert_details(c, resumes_by_id):
+    skills, experience, education = [], [], []
+    for candidate_id, resume in resumes_by_id.items():
+        rows = detail_rows(candidate_id, resume)
+        skills.extend(rows[0])
+        experience.extend(rows[1])
+        education.extend(rows[2])
+    c.executemany("INSERT INTO skills (candidate_id, skill, category) VALUES (?, ?, ?)", skills)
+    c.executemany(
+        "INSERT INTO experience (candidate_id, position, company, title, description, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        experience
+    )
+    c.executemany(
+        "INSERT INTO education (candidate_id, position, institution, degree, start_date, end_date) VALUES (?, ?, ?, ?, ?, ?)",
+        education
+    )
+
+
+def index_for_search(c, resumes_by_id):
+    rows = []
+    for candidate_id, resume in resumes_by_id.items():
+        skills = [skill for values in (resume.get("technical_skills") or {}).values() for skill in values or []]
+        experience = [
+            " ".join(str(job.get(field) or "") for field in ("title", "company", "description"))
+            for job in resume.get("experience") or []
+        ]
+        rows.append((
+            candidate_id,
+            resume.get("name") or "",
+            resume.get("email") or "",
+            resume.get("summary") or "",
+            " ".join(skills),
+            " ".join(experience),
+            " ".join(str(project) for project in resume.get("projects") or [])
+        ))
+    c.executemany(
+        "INSERT INTO candidates_fts (rowid, name, email, summary, skills, experience, projects) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+
+# -------------------- Database Functions --------------------
+def create_database():
+    with transaction() as c:
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                email TEXT UNIQUE,
+                phone TEXT,
+                json_data TEXT
+            )
+        ''')
+        # SHA-256 of already extracted PDFs -> candidate email
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS pdf_hashes (
+                sha256 TEXT PRIMARY KEY,
+                email TEXT,
+                file_name TEXT,
+                created_at REAL
+            )
+        ''')
+        c.execute("PRAGMA user_version")
+        version = c.fetchone()[0]
+        if version < 2:
+            migrate_json_blobs(c)
+        if version < 3:
+            create_search_index(c)
+        if version < 4:
+            rebuild_skills(c)
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def stored_resumes(c):
+    """{candidate id: resume dict} decoded from the json_data blobs."""
+    c.execute("SELECT id, json_data FROM candidates")
+    resumes_by_id = {}
+    for candidate_id, json_data in c.fetchall():
+        try:
+            resumes_by_id[candidate_id] = json.loads(json_data or "{}")
+        except json.JSONDecodeError:
+            resumes_by_id[candidate_id] = {}
+    return resumes_by_id
+
+
+def migrate_json_blobs(c):
+    """Schema version 2: resume fields out of the json_data blob into columns and child tables."""
+    c.execute("PRAGMA table_info(candidates)")
+    columns = {row[1] for row in c.fetchall()}
+    for column, sql_type in (("location", "TEXT"), ("summary", "TEXT"), ("years_experience", "REAL")):
+        if column not in columns:
+            c.execute(f"ALTER TABLE candidates ADD COLUMN {column} {sql_type}")
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+            skill TEXT,
+            category TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS experience (
+            candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+            position INTEGER,
+            company TEXT,
+            title TEXT,
+            description TEXT,
+            start_date TEXT,
+            end_date TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS education (
+            candidate_id INTEGER REFERENCES candidates(id) ON DELETE CASCADE,
+            position INTEGER,
+            institution TEXT,
+            degree TEXT,
+            start_date TEXT,
+            end_date TEXT
+        )
+    ''')
+    # email is indexed by its UNIQUE constraint
+    c.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates(name COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_candidates_location ON candidates(location COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_candidates_years ON candidates(years_experience)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_skills_skill ON skills(skill COLLATE NOCASE, candidate_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_skills_candidate ON skills(candidate_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_experience_candidate ON experience(candidate_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_education_candidate ON education(candidate_id)")
+
+    # Fill the new columns and tables from the existing blobs
+    resumes_by_id = stored_resumes(c)
+    c.executemany(
+        "UPDATE candidates SET location = ?, summary = ?, years_experience = ? WHERE id = ?",
+        [(*candidate_row(resume)[3:6], candidate_id) for candidate_id, resume in resumes_by_id.items()]
+    )
+    for table in ("skills", "experience", "education"):
+        c.execute(f"DELETE FROM {table}")
+    insert_details(c, resumes_by_id)
+
+
+def create_search_index(c):
+    """Schema version 3: FTS5 index over name, email, summary, skills, experience and projects."""
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+            name, email, summary, skills, experience, projects,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS candidates_fts_delete AFTER DELETE ON candidates BEGIN
+            DELETE FROM candidates_fts WHERE rowid = old.id;
+        END
+    ''')
+    c.execute("DELETE FROM candidates_fts")
+    resumes_by_id = stored_resumes(c)
+    index_for_search(c, resumes_by_id)
+
+
+def rebuild_skills(c):
+    """Schema version 4: skills deduplicated per category instead of across categories."""
+    c.execute("DELETE FROM skills")
+    skills = []
+    for candidate_id, resume in stored_resumes(c).items():
+        skills.extend(detail_rows(candidate_id, resume)[0])
+    c.executemany("INSERT INTO skills (candidate_id, skill, category) VALUES (?, ?, ?)", skills)
+
+
+def save_candidates(resumes, pdf_hashes=()):
+    """Insert resume dicts (with their skills, experience and education) and (sha256, email, file_name)
+    PDF hashes in one transaction.
+
+    Resumes whose email is already stored (or repeated in the batch) are skipped. Returns their emails.
+    """
+    resumes = list(resumes)
+    now = time.time()
+    emails = [resume.get("email", "") for resume in resumes]
+    with transaction() as c:
+        existing = set()
+        for i in range(0, len(emails), LOOKUP_BATCH):
+            batch = emails[i:i + LOOKUP_BATCH]
+            c.execute(f"SELECT email FROM candidates WHERE email IN ({','.join('?' * len(batch))})", batch)
+            existing.update(email for email, in c.fetchall())
+        duplicates = []
+        new_resumes = {}
+        for email, resume in zip(emails, resumes):
+            if email in existing:
+                duplicates.append(email)
+            else:
+                existing.add(email)
+                new_resumes[email] = resume
+        c.executemany(
+            "INSERT INTO candidates (name, email, phone, location, summary, years_experience, json_data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [candidate_row(resume) for resume in new_resumes.values()]
+        )
+
+        # Ids of the rows just inserted, for the child tables
+        new_emails = list(new_resumes)
+        resumes_by_id = {}
+        for i in range(0, len(new_emails), LOOKUP_BATCH):
+            batch = new_emails[i:i + LOOKUP_BATCH]
+            c.execute(f"SELECT id, email FROM candidates WHERE email IN ({','.join('?' * len(batch))})", batch)
+            resumes_by_id.update((candidate_id, new_resumes[email]) for candidate_id, email in c.fetchall())
+        insert_details(c, resumes_by_id)
+        index_for_search(c, resumes_by_id)
+
+        c.executemany(
+            "INSERT OR REPLACE INTO pdf_hashes (sha256, email, file_name, created_at) VALUES (?, ?, ?, ?)",
+            [(sha256, email, file_name, now) for sha256, email, file_name in pdf_hashes]
+        )
+    return duplicates
+
+
+def get_known_pdfs(hashes):
+    """Return {sha256: json_data} for the PDFs whose candidate is still in the database."""
+    hashes = list(hashes)
+    known = {}
+    for i in range(0, len(hashes), LOOKUP_BATCH):
+        batch = hashes[i:i + LOOKUP_BATCH]
+        known.update(query(
+            f"""SELECT h.sha256, c.json_data FROM pdf_hashes h
+                JOIN candidates c ON c.email = h.email
+                WHERE h.sha256 IN ({','.join('?' * len(batch))})""",
+            batch
+        ))
+    return known
+
+
+# Candidate columns shown by the UI: name, email, phone, location, summary, years of experience, skills
+CANDIDATE_COLUMNS = """
+    c.name, c.email, c.phone, c.location, c.summary, c.years_experience,
+    (SELECT group_concat(s.skill, ', ') FROM skills s WHERE s.candidate_id = c.id AND s.category = 'skills')
+"""
+CANDIDATE_SELECT = f"SELECT {CANDIDATE_COLUMNS} FROM candidates c"
+
+# Candidates decoded per query when streaming an export
+EXPORT_CHUNK = 2000
+
+
+# Column weights of bm25(): a hit in the name or email counts far more than one in a project description
+SEARCH_WEIGHTS = (10.0, 10.0, 2.0, 4.0, 1.0, 1.0)
+
+
+def fts_query(text):
+    """FTS5 query matching every word of the search box as a prefix ("pyt tun" -> "pyt"* AND "tun"*)."""
+    return " AND ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+def candidate_filters(search="", skills=(), locations=(), min_years=None):
+    """Return (FROM/WHERE clause, parameters, ORDER BY clause) shared by get_candidates and count_candidates."""
+    where, params = [], []
+    source = "FROM candidates c"
+    order = "ORDER BY c.id"
+    if search.strip():
+        source = "FROM candidates_fts f JOIN candidates c ON c.id = f.rowid"
+        where.append("candidates_fts MATCH ?")
+        params.append(fts_query(search))
+        order = f"ORDER BY bm25(candidates_fts, {', '.join(map(str, SEARCH_WEIGHTS))}), c.id"
+    for skill in skills:
+        where.append("c.id IN (SELECT candidate_id FROM skills WHERE skill = ? COLLATE NOCASE)")
+        params.append(skill)
+    if locations:
+        where.append(f"c.location COLLATE NOCASE IN ({','.join('?' * len(locations))})")
+        params.extend(locations)
+    if min_years:
+        where.append("c.years_experience >= ?")
+        params.append(min_years)
+    clause = source + (" WHERE " + " AND ".join(where) if where else "")
+    return clause, params, order
+
+
+def get_candidate_ids(search="", skills=(), locations=(), min_years=None, limit=None, offset=0):
+    """Ids of the candidates matching the search box (ranked by bm25), having every skill in `skills`
+    (any category), in one of `locations` and with at least min_years. One page when limit is given."""
+    clause, params, order = candidate_filters(search, skills, locations, min_years)
+    sql = "SELECT c.id " + clause + " " + order
+    if limit:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return [candidate_id for candidate_id, in query(sql, params)]
+
+
+def get_candidates_by_id(ids):
+    """Display columns of the given candidates, in the order of ids."""
+    rows = {}
+    for i in range(0, len(ids), LOOKUP_BATCH):
+        batch = ids[i:i + LOOKUP_BATCH]
+        rows.update(
+            (row[0], row[1:])
+            for row in query(f"SELECT c.id, {CANDIDATE_COLUMNS} FROM candidates c WHERE c.id IN ({','.join('?' * len(batch))})", batch)
+        )
+    return [rows[candidate_id] for candidate_id in ids if candidate_id in rows]
+
+
+def get_candidates(search="", skills=(), locations=(), min_years=None, limit=None, offset=0):
+    """Matching candidates (see get_candidate_ids). Rows are ranked and paged on ids only,
+    so summaries and skill lists are read for the returned page alone."""
+    return get_candidates_by_id(get_candidate_ids(search, skills, locations, min_years, limit, offset))
+
+
+def iter_candidates(search="", skills=(), locations=(), min_years=None, chunk_size=EXPORT_CHUNK):
+    """Yield every matching candidate in chunks of rows, to export large results with flat memory."""
+    ids = get_candidate_ids(search, skills, locations, min_years)
+    for i in range(0, len(ids), chunk_size):
+        yield get_candidates_by_id(ids[i:i + chunk_size])
+
+
+def count_candidates(search="", skills=(), locations=(), min_years=None):
+    clause, params, _ = candidate_filters(search, skills, locations, min_years)
+    return query("SELECT COUNT(*) " + clause, params)[0][0]
+
+
+def data_version():
+    """Changes whenever candidates are added or deleted (cache key for derived lists)."""
+    return tuple(query("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM candidates")[0])
+
+
+def list_skills(limit=500):
+    """Most frequent skills, for the filter widget."""
+    return [skill for skill, in query(
+        "SELECT skill FROM skills GROUP BY skill COLLATE NOCASE ORDER BY COUNT(DISTINCT candidate_id) DESC, skill LIMIT ?", (limit,)
+    )]
+
+
+def list_locations():
+    return [location for location, in query(
+        "SELECT DISTINCT location FROM candidates WHERE location != '' ORDER BY location COLLATE NOCASE"
+    )]
+
+
+def get_candidate_by_email(email):
+    rows = query(CANDIDATE_SELECT + " WHERE c.email = ?", (email,))
+    return rows[0] if rows else None
+
+
+def find_candidates_by_name(prefix, limit=50):
+    """Candidates whose name starts with prefix (case-insensitive, uses idx_candidates_name)."""
+    return query(
+        CANDIDATE_SELECT + " WHERE c.name LIKE ? ESCAPE '\\' LIMIT ?",
+        (prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%", limit)
+    )
+
+
+def delete_candidate_by_email(email):
+    with transaction() as c:
+        c.execute("DELETE FROM candidates WHERE email = ?", (email,))
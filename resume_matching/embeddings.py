@@ -0,0 +1,178 @@
+import time
+import hashlib
+import sqlite3
+import numpy as np
+import ollama_client
+
+# SQLite file holding every embedding computed so far
+EMBEDDINGS_DB = "embeddings.db"
+EMBED_MODEL = "nomic-embed-text"
+
+# Cosine similarity above which a requirement is FULL, below which it is NONE
+DEFAULT_FULL_THRESHOLD = 0.80
+DEFAULT_NONE_THRESHOLD = 0.45
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# -------------------- Database Functions --------------------
+def create_embeddings_db():
+    conn = sqlite3.connect(EMBEDDINGS_DB)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT,
+            text_hash TEXT,
+            vector BLOB,
+            created_at REAL,
+            PRIMARY KEY (model, text_hash)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def load_embeddings(hashes, model):
+    conn = sqlite3.connect(EMBEDDINGS_DB)
+    c = conn.cursor()
+    vectors = {}
+    hashes = list(hashes)
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(hashes), 500):
+        batch = hashes[i:i + 500]
+        c.execute(
+            f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+            [model] + batch
+        )
+        for h, blob in c.fetchall():
+            vectors[h] = np.frombuffer(blob, dtype=np.float32)
+    conn.close()
+    return vectors
+
+
+def save_embeddings(vectors, model):
+    now = time.time()
+    conn = sqlite3.connect(EMBEDDINGS_DB)
+    c = conn.cursor()
+    c.executemany(
+        "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, created_at) VALUES (?, ?, ?, ?)",
+        [(model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in vectors.items()]
+    )
+    conn.commit()
+    conn.close()
+
+
+# -------------------- Embedding Functions --------------------
+def request_embeddings(texts, model=EMBED_MODEL, batch_size=64):
+    """Call Ollama's /api/embed endpoint for a list of texts."""
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        response = ollama_client.post("/api/embed", {"model": model, "input": texts[i:i + batch_size]})
+        response.raise_for_status()
+        vectors.extend(response.json()["embeddings"])
+    return vectors
+
+
+def embed_texts(texts, model=EMBED_MODEL):
+    """Return an (n, dim) matrix of L2-normalised embeddings, computing only texts never seen before.
+
+    Returns (matrix, number of texts sent to Ollama).
+    """
+    hashes = [text_hash(t) for t in texts]
+    known = load_embeddings(set(hashes), model)
+    missing = {h: t for h, t in zip(hashes, texts) if h not in known}
+    if missing:
+        new_vectors = dict(zip(missing.keys(), request_embeddings(list(missing.values()), model)))
+        save_embeddings(new_vectors, model)
+        known.update({h: np.asarray(v, dtype=np.float32) for h, v in new_vectors.items()})
+
+    matrix = np.vstack([known[h] for h in hashes]) if hashes else np.zeros((0, 1), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms), len(missing)
+
+
+def resume_chunks(resume_json):
+    """Split a resume into short texts (skills, each experience, project, degree, summary)."""
+    chunks = []
+    skills = resume_json.get("technical_skills") or {}
+    if isinstance(skills, dict):
+        for name, values in skills.items():
+            if values:
+                chunks.append(f"{name.replace('_', ' ')}: {', '.join(values)}")
+    for exp in resume_json.get("experience") or []:
+        if isinstance(exp, dict):
+            chunks.append(f"{exp.get('title') or ''} at {exp.get('company') or ''}. {exp.get('description') or ''}".strip())
+    for edu in resume_json.get("education") or []:
+        if isinstance(edu, dict):
+            chunks.append(f"{edu.get('degree') or ''}, {edu.get('institution') or ''}")
+    for field in ("projects", "certifications", "languages"):
+        chunks.extend(value for value in resume_json.get(field) or [] if isinstance(value, str) and value)
+    if resume_json.get("summary"):
+        chunks.append(resume_json["summary"])
+    return chunks
+
+
+def triage_requirements(resumes, items, model=EMBED_MODEL,
+                        full_threshold=DEFAULT_FULL_THRESHOLD, none_threshold=DEFAULT_NONE_THRESHOLD):
+    """Decide clear FULL/NONE requirement matches from embedding similarity.
+
+    resumes maps a resume file to its JSON, items comes from job_spec.parse_requirements.
+    The similarity of a requirement to a resume is its best cosine similarity over the
+    resume chunks, computed for all requirements x all chunks in one matrix product.
+
+    Returns ({file: {"decided": [match records], "ambiguous": [items]}}, stats).
+    """
+    files = list(resumes)
+    if not files or not items:
+        return {file: {"decided": [], "ambiguous": list(items)} for file in files}, {"pairs": 0, "full": 0, "none": 0, "embedded": 0}
+
+    chunk_texts = []
+    owners = []
+    for position, file in enumerate(files):
+        chunks = resume_chunks(resumes[file]) or [""]
+        chunk_texts.extend(chunks)
+        owners.extend([position] * len(chunks))
+
+    requirement_vectors, new_requirements = embed_texts([item["label"] for item in items], model)
+    chunk_vectors, new_chunks = embed_texts(chunk_texts, model)
+
+    # (requirements x chunks) similarities, then best chunk per resume via reduceat over contiguous owners
+    similarities = requirement_vectors @ chunk_vectors.T
+    starts = np.flatnonzero(np.r_[True, np.diff(owners) != 0])
+    best = np.maximum.reduceat(similarities, starts, axis=1)
+    best_chunk = np.array([
+        start + np.argmax(similarities[:, start:end], axis=1)
+        for start, end in zip(starts, list(starts[1:]) + [len(owners)])
+    ]).T
+
+    triage = {}
+    decided_full = decided_none = 0
+    for col, file in enumerate(files):
+        decided, ambiguous = [], []
+        for row, item in enumerate(items):
+            score = float(best[row, col])
+            if score >= full_threshold or score <= none_threshold:
+                match = "FULL" if score >= full_threshold else "NONE"
+                decided_full += match == "FULL"
+                decided_none += match == "NONE"
+                evidence = chunk_texts[best_chunk[row, col]][:200] if match == "FULL" else ""
+                decided.append({
+                    "requirement": item["label"],
+                    "match": match,
+                    "evidence": f"Embedding similarity {score:.2f}. {evidence}".strip(),
+                    "source": "Inference",
+                    "importance": item["weight"]
+                })
+            else:
+                ambiguous.append(item)
+        triage[file] = {"decided": decided, "ambiguous": ambiguous}
+
+    stats = {
+        "pairs": len(files) * len(items),
+        "full": decided_full,
+        "none": decided_none,
+        "embedded": new_requirements + new_chunks
+    }
+    return triage, stats
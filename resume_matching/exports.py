@@ -0,0 +1,46 @@
+import io
+import csv
+import tempfile
+import xlsxwriter
+
+EXPORT_COLUMNS = ["Name", "Email", "Phone", "Location", "Summary", "Skills", "Years of Experience"]
+
+
+def export_row(row):
+    """(name, email, phone, location, summary, years, skills) from db.py -> EXPORT_COLUMNS order."""
+    name, email, phone, location, summary, years_experience, skills = row
+    return [name, email, phone, location, summary, skills or "", years_experience]
+
+
+def export_csv(chunks):
+    """Write chunks of candidate rows to a temporary CSV file and return its content as bytes.
+
+    Only one chunk of rows is in memory while the file is written; the returned bytes are the
+    whole file, which st.download_button keeps in memory to serve it.
+    """
+    with tempfile.TemporaryFile() as f:
+        text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in chunks:
+            writer.writerows(export_row(row) for row in rows)
+        text.flush()
+        text.detach()
+        f.seek(0)
+        return f.read()
+
+
+def export_excel(chunks):
+    """Same as export_csv for .xlsx. constant_memory makes xlsxwriter flush each row as it is written."""
+    with tempfile.TemporaryFile() as f:
+        workbook = xlsxwriter.Workbook(f, {"constant_memory": True})
+        worksheet = workbook.add_worksheet("Candidats")
+        worksheet.write_row(0, 0, EXPORT_COLUMNS)
+        row_number = 1
+        for rows in chunks:
+            for row in rows:
+                worksheet.write_row(row_number, 0, export_row(row))
+                row_number += 1
+        workbook.close()
+        f.seek(0)
+        return f.read()
@@ -0,0 +1,172 @@
+import time
+import random
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 180
+
+
+class LowQualityExtraction(Exception):
+    """Raised by an extractor whose result is too incomplete to be trusted."""
+
+    def __init__(self, quality):
+        super().__init__(f"low extraction quality: {quality}")
+        self.quality = quality
+
+
+# -------------------- Extractors --------------------
+class Extractor:
+    """Turns one PDF into a dict matching the Resume schema. Must be safe to call from several threads."""
+    name = "extractor"
+
+    def extract(self, pdf_path):
+        raise NotImplementedError
+
+
+class CloudExtractor(Extractor):
+    """LlamaExtract agent (one network round trip per file)."""
+    name = "LlamaExtract (cloud)"
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def extract(self, pdf_path):
+        return self.agent.extract(str(pdf_path)).data
+
+
+class StubExtractor(Extractor):
+    """Local stand-in with a simulated latency and no network, for benchmarking the pipeline."""
+    name = "Local stub (no network)"
+
+    def __init__(self, latency=1.0, jitter=0.5, seed=0, hung=(), hang_s=3600):
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        # Files (by stem) whose call hangs for hang_s, to exercise the timeout
+        self.hung = set(hung)
+        self.hang_s = hang_s
+
+    def extract(self, pdf_path):
+        stem = Path(pdf_path).stem
+        if stem in self.hung:
+            time.sleep(self.hang_s)
+        rng = random.Random(f"{self.seed}:{stem}")
+        time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        return {
+            "name": stem,
+            "phone": "",
+            "email": f"{stem.lower()}@example.com",
+            "links": [],
+            "experience": [],
+            "education": [],
+            "technical_skills": {"programming_languages": [], "frameworks": [], "skills": []},
+            "key_accomplishments": "",
+            "certifications": [],
+            "projects": [],
+            "languages": [],
+            "interests": [],
+            "hobbies": [],
+            "awards": [],
+            "volunteer_experience": [],
+            "references": [],
+            "summary": "",
+            "location": ""
+        }
+
+
+class FallbackExtractor(Extractor):
+    """Try a fast extractor first and hand the file to a second one when the first rejects its result
+    or fails on the file (corrupt or encrypted PDF, crashed worker...)."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name} → {fallback.name}"
+        self.counts = {"primary": 0, "fallback": 0}
+        self._lock = threading.Lock()
+
+    def extract(self, pdf_path):
+        try:
+            data = self.primary.extract(pdf_path)
+            used = "primary"
+        except Exception:
+            data = self.fallback.extract(pdf_path)
+            used = "fallback"
+        with self._lock:
+            self.counts[used] += 1
+        return data
+
+
+# -------------------- Concurrent Stage --------------------
+def start_call(function, *args):
+    """Run function(*args) on its own daemon thread and return a Future of its result.
+
+    A daemon thread can be abandoned: a call that never returns neither holds a pool slot
+    nor keeps the process from exiting.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def extract_concurrently(pdf_paths, extractor, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+    """Run the extractor over the PDFs with at most max_workers calls in flight.
+
+    Yields (pdf_path, data, error, seconds) in completion order, so callers can store each
+    result as soon as it arrives. A file still running after `timeout` seconds is reported
+    with a TimeoutError and its call is abandoned: it stops counting against max_workers,
+    so the queued files start right away instead of waiting behind a hung call.
+    """
+    queue = deque(pdf_paths)
+    running = {}
+
+    while queue or running:
+        while queue and len(running) < max_workers:
+            pdf_path = queue.popleft()
+            running[start_call(extractor.extract, pdf_path)] = (pdf_path, time.time())
+
+        finished, _ = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+        now = time.time()
+        for future in finished:
+            pdf_path, started = running.pop(future)
+            try:
+                yield pdf_path, future.result(), None, now - started
+            except Exception as e:
+                yield pdf_path, None, e, now - started
+
+        for future in [f for f, (_, started) in running.items() if now - started > timeout]:
+            pdf_path, started = running.pop(future)
+            yield pdf_path, None, TimeoutError(f"no result after {timeout}s"), now - started
+
+
+def throughput_report(records, duration):
+    """Aggregate (seconds, status) records of one run. status is "ok", "error" or "timeout"."""
+    latencies = sorted(seconds for seconds, status in records if status == "ok")
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+    return {
+        "files": len(records),
+        "ok": len(latencies),
+        "errors": sum(1 for _, status in records if status == "error"),
+        "timeouts": sum(1 for _, status in records if status == "timeout"),
+        "duration_s": round(duration, 2),
+        "files_per_min": round(len(records) / duration * 60, 1) if duration > 0 else 0.0,
+        "mean_s": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p95_s": round(percentile(0.95), 2),
+        # Sum of per-file latencies over wall time: how many calls were effectively overlapping
+        "concurrency": round(sum(seconds for seconds, _ in records) / duration, 2) if duration > 0 else 0.0
+    }
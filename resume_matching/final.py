@@ -1,3 +1,5 @@
+import hashlib
+import numpy as np
 import streamlit as st
 import pandas as pd
 
@@ -5,6 +7,44 @@ st.set_page_config(page_title="Candidate Matcher", layout="wide")
 
 st.title("📊 Candidate Score Merger")
 
+# Function to hash an uploaded file once per upload
+def file_hash(uploaded_file):
+    hashes = st.session_state.setdefault("file_hashes", {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return hashes[uploaded_file.file_id]
+
+# Function to build the merged table, cached by the hashes of both uploads
+# (cache_resource hands back the same DataFrame without copying it on every rerun)
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_merged(info_hash, score_hash, _candidate_info_file, _score_file):
+    scores_df = pd.read_csv(_score_file)
+
+    # Score index: normalized name -> score (normalize names by removing underscores and lowercasing)
+    scores_df["merge_key"] = scores_df["Name"].str.replace("_", "", regex=False).str.lower()
+    score_index = scores_df.drop_duplicates("merge_key").set_index("merge_key")["Score"]
+
+    # Join candidate info against the score index (the page shows the whole table, so it is read at once)
+    _candidate_info_file.seek(0)
+    merged_df = pd.read_csv(_candidate_info_file)
+    merge_key = merged_df["Name"].str.replace(" ", "", regex=False).str.lower()
+    merged_df["Score"] = merge_key.map(score_index)
+    return merged_df
+
+# Function to sort the merged table once per pair of uploads
+@st.cache_resource(max_entries=4, show_spinner=False)
+def sort_merged(info_hash, score_hash, _merged_df):
+    return _merged_df.sort_values(by="Score", ascending=False)
+
+# Function to select the top N rows by score without sorting the whole table
+def top_n(merged_df, n):
+    scores = merged_df["Score"].to_numpy(dtype=float, na_value=np.nan)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    top = np.argpartition(-scores, n - 1)[:n]
+    # Order the selection by score, ties in file order like a stable sort
+    top = top[np.lexsort((top, -scores[top]))]
+    return merged_df.iloc[top]
+
 # Step 1: Upload both files
 col1, col2 = st.columns(2)
 with col1:
@@ -14,34 +54,21 @@ with col2:
 
 if candidate_info_file and score_file:
     try:
-        # Load CSVs
-        candidate_info_df = pd.read_csv(candidate_info_file)
-        scores_df = pd.read_csv(score_file)
-
-        # Create merge keys: normalize names by removing spaces and lowercasing
-        candidate_info_df["merge_key"] = candidate_info_df["Name"].str.replace(" ", "", regex=False).str.lower()
-        scores_df["merge_key"] = scores_df["Name"].str.replace("_", "", regex=False).str.lower()
-
-        # Merge on merge_key
-        merged_df = pd.merge(candidate_info_df, scores_df[["merge_key", "Score"]], on="merge_key", how="left")
-
-        # Drop helper column
-        merged_df.drop(columns=["merge_key"], inplace=True)
-
-        # Sort by score descending
-        merged_df = merged_df.sort_values(by="Score", ascending=False)
+        info_hash = file_hash(candidate_info_file)
+        score_hash = file_hash(score_file)
+        merged_df = load_merged(info_hash, score_hash, candidate_info_file, score_file)
+        sorted_df = sort_merged(info_hash, score_hash, merged_df)
 
         st.success("✅ Files uploaded and merged successfully!")
 
         # Display full merged table
         st.subheader("🔍 Merged Candidate Table (Sorted by Score ↓)")
-        st.dataframe(merged_df, use_container_width=True)
+        st.dataframe(sorted_df, use_container_width=True)
 
-        # Download merged table
-        csv = merged_df.to_csv(index=False).encode("utf-8")
+        # Download merged table (built only when the button is clicked)
         st.download_button(
             label="📥 Download Merged Table as CSV",
-            data=csv,
+            data=lambda: sorted_df.to_csv(index=False).encode("utf-8"),
             file_name="merged_candidates_scores.csv",
             mime="text/csv"
         )
@@ -56,7 +83,7 @@ if candidate_info_file and score_file:
             step=1
         )
 
-        top_candidates = merged_df.head(num_top).sort_values(by="Score", ascending=False)
+        top_candidates = top_n(merged_df, int(num_top))
 
         st.subheader(f"🏆 Top {num_top} Candidates")
         st.dataframe(top_candidates, use_container_width=True)
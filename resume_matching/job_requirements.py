@@ -1,12 +1,31 @@
 import streamlit as st
-import requests
+import ollama_client
+import requirements_cache
+import os
 import re
 import json
 import time
-
-def generate_job_requirements(job_title, model="llama3:latest"):
-    url = "http://localhost:11434/api/generate"
-    prompt = f"""    -Goal-  
+import pandas as pd
+from job_spec import parse_requirements
+from skill_taxonomy import canonicalize_requirements, prompt_token_savings
+
+# Categories the generation prompt asks for (offered for new rows in the bulk editor)
+DEFAULT_CATEGORIES = ["Core skills", "Technical skills", "Experience requirements", "Education requirements", "Soft skills"]
+
+# Models offered in the sidebar (bench_models.py measures the same list)
+MODEL_OPTIONS = {
+    "llama3:latest": "Llama 3 (Best quality)",
+    "gemma:2b": "Gemma 2B (Faster)",
+    "mistral:latest": "Mistral (Balanced)"
+}
+
+# Function to preload a model once per server process
+@st.cache_resource(show_spinner=False)
+def warm_up_model(model, keep_alive="30m"):
+    return ollama_client.warm_up(model, keep_alive)
+
+def build_requirements_prompt(job_title):
+    return f"""    -Goal-  
             You are a job description parser. Your task is to extract and structure the requirements from a job description.
             Given a job description for a {job_title} position, extract and structure the requirements into the following JSON format with weights (0-1) .  
             -Output Requirements-  
@@ -71,26 +90,29 @@ def generate_job_requirements(job_title, model="llama3:latest"):
             - Weights must be between 0.0 and 1.0
             - Ensure valid JSON format with proper quotes and commas
             - This output will be used directly for resume screening, so be thorough and precise"""
+
+def parse_requirements_output(raw_output):
+    """Extract the requirements JSON object from a model response (raises ValueError)."""
+    json_match = re.search(r"\{.*\}", raw_output, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON object found in the model response.")
+    return json.loads(json_match.group(0))
+
+def generate_job_requirements(job_title, model="llama3:latest"):
+    prompt = build_requirements_prompt(job_title)
     payload = {
         "model": model,
         "prompt": prompt,
         "stream": False,
-        "format": "json"
+        "format": "json",
+        "keep_alive": "30m"
     }
 
     try:
-        response = requests.post(url, json=payload)
+        response = ollama_client.post("/api/generate", payload)
         response.raise_for_status()
         data = response.json()
-        raw_output = data.get("response", "")
-
-        # Extract the JSON block using regex
-        json_match = re.search(r"\{.*\}", raw_output, re.DOTALL)
-        if not json_match:
-            raise ValueError("No JSON object found in the model response.")
-
-        json_str = json_match.group(0)
-        return json.loads(json_str)
+        return parse_requirements_output(data.get("response", ""))
 
     except Exception as e:
         st.error(f"Error parsing job requirements: {e}")
@@ -198,7 +220,7 @@ def edit_job_requirements(requirements: dict) -> dict:
         temp_weights[category] = updated_items
 
     # Button to apply updates
-    if st.button("✅ Update Requirements"):
+    if st.button("✅ Update Requirements", key="update_requirements"):
         requirements["job_type"] = temp_job_type
         requirements["importance_weights"] = temp_weights
         st.success("Job requirements updated successfully!")
@@ -206,6 +228,99 @@ def edit_job_requirements(requirements: dict) -> dict:
     return requirements
 
 
+def requirements_to_frame(requirements):
+    """One row per requirement: category, key ("skill"/"requirement"), label, weight."""
+    _, items = parse_requirements(json.dumps(requirements))
+    return pd.DataFrame(items, columns=["category", "key", "label", "weight"])
+
+def frame_to_requirements(job_type, df):
+    """Validate an edited requirements table and rebuild the requirements dict.
+
+    Returns (requirements, errors); requirements is None when errors is not empty.
+    Rows without a label are dropped, so blank rows added by mistake are ignored.
+    """
+    errors = []
+    weights = {}
+    seen = set()
+    df = df.reset_index(drop=True)
+    for position, row in df.iterrows():
+        label = str(row["label"] or "").strip() if pd.notna(row["label"]) else ""
+        if not label:
+            continue
+        category = row["category"] if pd.notna(row["category"]) and row["category"] else None
+        if category is None:
+            errors.append(f"Row {position + 1} ({label}): choose a category.")
+            continue
+        weight = row["weight"]
+        if pd.isna(weight) or not 0.0 <= float(weight) <= 1.0:
+            errors.append(f"Row {position + 1} ({label}): weight must be between 0 and 1.")
+            continue
+        if (category, label.lower()) in seen:
+            errors.append(f"Row {position + 1}: '{label}' appears twice in {category}.")
+            continue
+        seen.add((category, label.lower()))
+        key = row["key"] if pd.notna(row["key"]) and row["key"] else ("skill" if "skill" in category.lower() else "requirement")
+        weights.setdefault(category, []).append({key: label, "weight": round(float(weight), 2)})
+    if not job_type.strip():
+        errors.append("Job Type cannot be empty.")
+    if errors:
+        return None, errors
+    return {"job_type": job_type.strip(), "importance_weights": weights}, []
+
+def bulk_edit_job_requirements(requirements: dict):
+    """Edit every requirement in one data editor; changes are applied together on submit.
+
+    Returns (requirements, applied).
+    """
+    st.header("Bulk Edit Job Requirements")
+    categories = list(dict.fromkeys(list(requirements.get("importance_weights", {})) + DEFAULT_CATEGORIES))
+
+    # A form keeps cell edits client-side until Apply, so editing does not rerun the page
+    with st.form("bulk_edit"):
+        job_type = st.text_input("Job Type", value=requirements.get("job_type", ""))
+        edited = st.data_editor(
+            requirements_to_frame(requirements),
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_order=["category", "label", "weight"],
+            column_config={
+                "category": st.column_config.SelectboxColumn("Category", options=categories, required=True),
+                "label": st.column_config.TextColumn("Skill / Requirement", required=True),
+                "weight": st.column_config.NumberColumn("Weight", min_value=0.0, max_value=1.0, step=0.01, format="%.2f", required=True)
+            },
+            key="bulk_editor"
+        )
+        submitted = st.form_submit_button("✅ Apply changes")
+
+    if not submitted:
+        return requirements, False
+    updated, errors = frame_to_requirements(job_type, edited)
+    if errors:
+        st.error("Changes not applied:\n\n" + "\n".join(f"- {error}" for error in errors))
+        return requirements, False
+    st.success(f"Job requirements updated ({sum(len(items) for items in updated['importance_weights'].values())} items).")
+    return updated, True
+
+def show_canonicalization_report(report, json_dir="parsed_json"):
+    """Summarize a skill_taxonomy merge: list size and match-prompt tokens saved per stored resume."""
+    before, after = report["items_before"], report["items_after"]
+    resume_texts = []
+    if os.path.isdir(json_dir):
+        for file in sorted(os.listdir(json_dir)):
+            if file.endswith(".json"):
+                with open(os.path.join(json_dir, file), "r", encoding="utf-8") as f:
+                    resume_texts.append(json.dumps(json.load(f), indent=2, ensure_ascii=False))
+    savings = prompt_token_savings(report, resume_texts)
+    message = f"🧹 {before} → {after} items ({(before - after) / before:.0%} fewer)" if before else "🧹 No items"
+    if savings:
+        message += f" · ~{sum(savings) / len(savings):.0f} fewer match-prompt tokens per resume ({len(savings)} resumes)"
+    st.info(message)
+    if report["merges"]:
+        with st.expander(f"🔗 {len(report['merges'])} merged item(s)"):
+            st.dataframe(pd.DataFrame(report["merges"], columns=["Kept", "Merged"]), use_container_width=True, hide_index=True)
+
+
 def main():
     """Main application logic."""
     st.set_page_config(
@@ -215,24 +330,56 @@ def main():
     )
 
     st.title("💼 Job Requirements Generator")
+    requirements_cache.create_cache()
 
     with st.sidebar:
         st.header("Configuration")
         st.subheader("Model Selection")
-        model_options = {
-            "llama3:latest": "Llama 3 (Best quality)",
-            "gemma:2b": "Gemma 2B (Faster)",
-            "mistral:latest": "Mistral (Balanced)"
-        }
         model_type = st.selectbox(
             "Choose Model",
-            list(model_options.keys()),
-            format_func=lambda x: model_options[x],
+            list(MODEL_OPTIONS.keys()),
+            format_func=lambda x: MODEL_OPTIONS[x],
             index=0
         )
+        merge_duplicates = st.checkbox(
+            "🧹 Merge duplicate skills",
+            value=False,
+            help=(
+                "Resolve aliases (sklearn → scikit-learn) and merge duplicates within each category after generation, "
+                "keeping the highest weight"
+            )
+        )
 
         st.info("Ensure you have Ollama running locally with these models installed.")
 
+        try:
+            load_time = warm_up_model(model_type)
+            st.caption(f"🔥 {model_type} preloaded ({load_time:.1f}s at startup)")
+        except Exception as e:
+            st.warning(f"⚠️ Could not preload {model_type}: {e}")
+
+        with st.expander("📚 Requirements library"):
+            cached = requirements_cache.list_cached()
+            if cached:
+                labels = [f"{row['title']} · {row['model']}" + (" ✏️" if row["edited"] else "") for row in cached]
+                selected = st.selectbox("Cached roles", range(len(cached)), format_func=lambda i: labels[i])
+                entry = cached[selected]
+                load_col, forget_col = st.columns(2)
+                if load_col.button("📂 Load", use_container_width=True):
+                    requirements, _ = requirements_cache.get_requirements(entry["title"], entry["model"])
+                    if requirements:
+                        st.session_state.requirements = requirements
+                        st.session_state.requirements_key = (entry["title"], entry["model"])
+                if forget_col.button("🗑️ Forget", use_container_width=True):
+                    requirements_cache.invalidate(entry["title"], entry["model"])
+                    st.rerun()
+                st.caption(f"{len(cached)} cached role(s) · keeps the {requirements_cache.DEFAULT_MAX_ENTRIES} most recently used")
+                if st.button("Clear library"):
+                    requirements_cache.clear_cache()
+                    st.rerun()
+            else:
+                st.caption("No cached requirements yet.")
+
         with st.expander("ℹ️ About this app"):
             st.markdown("""
             This app helps recruiters to:
@@ -246,32 +393,56 @@ def main():
         job_title = st.text_input("Enter Job Title", placeholder="e.g. Data Scientist")
     with col2:
         generate_button = st.button("🚀 Generate Requirements", disabled=not job_title)
+        regenerate = st.checkbox("Ignore cache", help="Ask the model again and replace the cached requirements for this title")
 
     if generate_button:
-        with st.spinner(f"Generating requirements for '{job_title}' using {model_type}..."):
-            start_time = time.time()
-            requirements = generate_job_requirements(job_title, model=model_type)
-            duration = time.time() - start_time
-
-            if requirements:
-                st.success(f"✅ Generated in {duration:.2f} seconds using {model_type}")
-                st.session_state.requirements = requirements
-            else:
-                st.error("❌ Failed to generate valid requirements.")
+        start_time = time.time()
+        cached_title = None
+        if not regenerate:
+            requirements, cached_title = requirements_cache.get_requirements(job_title, model_type)
+        if cached_title:
+            st.success(f"⚡ Loaded '{cached_title}' from the cache in {(time.time() - start_time) * 1000:.0f} ms")
+            st.session_state.requirements = requirements
+            st.session_state.requirements_key = (cached_title, model_type)
+        else:
+            with st.spinner(f"Generating requirements for '{job_title}' using {model_type}..."):
+                requirements = generate_job_requirements(job_title, model=model_type)
+                duration = time.time() - start_time
+
+                if requirements:
+                    st.success(f"✅ Generated in {duration:.2f} seconds using {model_type}")
+                    if merge_duplicates:
+                        requirements, report = canonicalize_requirements(requirements)
+                        show_canonicalization_report(report)
+                    st.session_state.requirements = requirements
+                    st.session_state.requirements_key = (job_title, model_type)
+                    requirements_cache.save_requirements(job_title, model_type, requirements)
+                else:
+                    st.error("❌ Failed to generate valid requirements.")
 
     if "requirements" in st.session_state:
         view_mode = st.radio(
             "Select Mode", 
-            ["View Requirements", "Edit Requirements"], 
+            ["View Requirements", "Edit Requirements", "Bulk Edit (table)"], 
             horizontal=True,
             key="view_mode"
         )
 
         if view_mode == "View Requirements":
+            if st.button("🧹 Merge duplicate skills", key="merge_duplicates"):
+                st.session_state.requirements, report = canonicalize_requirements(st.session_state.requirements)
+                show_canonicalization_report(report)
+                if "requirements_key" in st.session_state:
+                    title, model = st.session_state.requirements_key
+                    requirements_cache.save_requirements(title, model, st.session_state.requirements, edited=True)
             display_job_requirements(st.session_state.requirements)
 
         elif view_mode == "Edit Requirements":
             st.session_state.requirements = edit_job_requirements(st.session_state.requirements)
+            # Edits replace the cached requirements for the title they were generated for
+            if st.session_state.get("update_requirements") and "requirements_key" in st.session_state:
+                title, model = st.session_state.requirements_key
+                requirements_cache.save_requirements(title, model, st.session_state.requirements, edited=True)
             st.success("Modifications saved. Switch to 'View Requirements' to preview.")
 
             # Download updated JSON
@@ -282,6 +453,27 @@ def main():
                 mime="application/json"
             )
 
+        elif view_mode == "Bulk Edit (table)":
+            st.session_state.requirements, applied = bulk_edit_job_requirements(st.session_state.requirements)
+            if applied and "requirements_key" in st.session_state:
+                title, model = st.session_state.requirements_key
+                requirements_cache.save_requirements(title, model, st.session_state.requirements, edited=True)
+
+            st.download_button(
+                label="📥 Download Modified Requirements",
+                data=json.dumps(st.session_state.requirements, indent=2),
+                file_name=f"{st.session_state.requirements['job_type'].replace(' ', '_')}_requirements.json",
+                mime="application/json",
+                key="download_bulk_requirements"
+            )
+
+    with st.sidebar.expander("📈 Ollama call latency"):
+        latency_rows = ollama_client.latency_summary()
+        if latency_rows:
+            st.dataframe(pd.DataFrame(latency_rows), use_container_width=True)
+        else:
+            st.caption("No Ollama calls yet.")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
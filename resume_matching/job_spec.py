@@ -0,0 +1,45 @@
+import json
+
+
+def parse_requirements(job_text):
+    """Parse a job_requirements.py JSON export into (job_type, items).
+
+    Each item is {"category", "key", "label", "weight"} where key is "skill" or "requirement".
+    Returns (None, []) when the text is not such an export.
+    """
+    try:
+        requirements = json.loads(job_text)
+        categories = requirements.get("importance_weights", {})
+    except (json.JSONDecodeError, AttributeError):
+        return None, []
+    if not isinstance(categories, dict):
+        return None, []
+
+    items = []
+    for category, entries in categories.items():
+        for entry in entries or []:
+            if not isinstance(entry, dict):
+                continue
+            key = "skill" if entry.get("skill") else "requirement"
+            label = entry.get(key) or ""
+            if label:
+                items.append({
+                    "category": category,
+                    "key": key,
+                    "label": label,
+                    "weight": float(entry.get("weight") or 0.0)
+                })
+    return requirements.get("job_type", ""), items
+
+
+def requirements_to_job_text(job_type, items, with_ids=False):
+    """Inverse of parse_requirements: rebuild the JSON export for a subset of items.
+
+    With with_ids=True each entry also gets an "id" ("R1", "R2"... in item order) the model can echo back.
+    """
+    weights = {}
+    for position, item in enumerate(items, start=1):
+        entry = {"id": f"R{position}"} if with_ids else {}
+        entry.update({item["key"]: item["label"], "weight": item["weight"]})
+        weights.setdefault(item["category"], []).append(entry)
+    return json.dumps({"job_type": job_type, "importance_weights": weights}, indent=2, ensure_ascii=False)
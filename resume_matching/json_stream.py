@@ -0,0 +1,91 @@
+import json
+
+# Fields every requirement object must carry to be usable by score.py
+REQUIRED_FIELDS = ("requirement", "match")
+
+
+class MalformedStreamError(ValueError):
+    """Raised as soon as the streamed text can no longer be a JSON array of requirement objects."""
+
+
+class RequirementStreamParser:
+    """Incrementally parse a JSON array of requirement objects from streamed model tokens.
+
+    Text before the opening '[' (e.g. a ```json fence) is skipped, anything after the
+    closing ']' is ignored. Each completed object is returned by feed() as soon as its
+    closing brace arrives.
+    """
+
+    def __init__(self, max_preamble=500):
+        self.max_preamble = max_preamble
+        self.state = "preamble"
+        self.preamble_length = 0
+        self.expect_comma = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.current = []
+        self.items = []
+
+    @property
+    def done(self):
+        return self.state == "done"
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the requirement objects it completed."""
+        completed = []
+        for char in chunk:
+            if self.state == "preamble":
+                if char == "[":
+                    self.state = "array"
+                else:
+                    self.preamble_length += 1
+                    if self.preamble_length > self.max_preamble:
+                        raise MalformedStreamError("No JSON array found at the start of the output.")
+            elif self.state == "array":
+                if char.isspace():
+                    continue
+                if char == "{" and not self.expect_comma:
+                    self.state = "object"
+                    self.depth = 1
+                    self.current = [char]
+                elif char == "," and self.expect_comma:
+                    self.expect_comma = False
+                elif char == "]":
+                    self.state = "done"
+                else:
+                    raise MalformedStreamError(f"Unexpected character {char!r} between requirement objects.")
+            elif self.state == "object":
+                self.current.append(char)
+                if self.in_string:
+                    if self.escape:
+                        self.escape = False
+                    elif char == "\\":
+                        self.escape = True
+                    elif char == '"':
+                        self.in_string = False
+                elif char == '"':
+                    self.in_string = True
+                elif char == "{":
+                    self.depth += 1
+                elif char == "}":
+                    self.depth -= 1
+                    if self.depth == 0:
+                        completed.append(self._close_object())
+            else:
+                break
+        return completed
+
+    def _close_object(self):
+        text = "".join(self.current)
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise MalformedStreamError(f"Invalid requirement object: {e}")
+        if not isinstance(item, dict) or any(field not in item for field in REQUIRED_FIELDS):
+            raise MalformedStreamError(f"Requirement object is missing {', '.join(REQUIRED_FIELDS)}.")
+        self.state = "array"
+        self.expect_comma = True
+        self.current = []
+        self.items.append(item)
+        return item
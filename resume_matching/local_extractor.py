@@ -0,0 +1,388 @@
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pypdf import PdfReader
+from resume_schema import Resume
+from extraction import Extractor, LowQualityExtraction
+
+# Below these, the local result is rejected and the file goes to the cloud extractor
+DEFAULT_MIN_COVERAGE = 0.8
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Fewer characters than this means a scanned PDF without a text layer
+MIN_TEXT_CHARS = 200
+
+# Section headings (lowercase, without trailing ":") -> Resume field they feed
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "professional summary", "about me", "objective", "career objective", "profil", "résumé"],
+    "experience": [
+        "experience", "experiences", "work experience", "professional experience", "employment history",
+        "work history", "internships", "expérience", "expériences", "expérience professionnelle", "expériences professionnelles"
+    ],
+    "education": ["education", "academic background", "formation", "formations", "éducation", "parcours académique"],
+    "skills": ["skills", "technical skills", "core skills", "technologies", "compétences", "compétences techniques"],
+    "projects": ["projects", "academic projects", "personal projects", "projets", "projets académiques"],
+    "certifications": ["certifications", "certificates", "licenses & certifications", "licenses and certifications"],
+    "languages": ["languages", "langues"],
+    "interests": ["interests", "centres d'intérêt", "centres d'intérêts"],
+    "hobbies": ["hobbies", "loisirs"],
+    "awards": ["awards", "honors", "honors & awards", "honors and awards", "achievements", "competitions", "distinctions"],
+    "volunteer_experience": [
+        "volunteering", "volunteer experience", "volunteer", "associative life", "vie associative",
+        "extracurricular activities", "activités parascolaires"
+    ],
+    "references": ["references", "références"],
+    "additional": ["additional information", "additional informations", "other", "informations complémentaires"]
+}
+HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+PROGRAMMING_LANGUAGES = {
+    "python", "java", "javascript", "typescript", "c", "c++", "c#", "go", "golang", "rust", "ruby", "php", "kotlin",
+    "swift", "scala", "r", "matlab", "dart", "sql", "bash", "shell", "perl", "haskell", "julia", "lua", "objective-c"
+}
+FRAMEWORKS = {
+    "django", "flask", "fastapi", "spring", "spring boot", "react", "react.js", "angular", "vue", "vue.js", "node.js",
+    "express", "express.js", "laravel", "symfony", "flutter", ".net", "asp.net", "pytorch", "tensorflow", "keras",
+    "scikit-learn", "langchain", "llamaindex", "streamlit", "next.js", "nestjs", "rails", "hugging face", "transformers"
+}
+
+TITLE_WORDS = re.compile(
+    r"\b(engineer|developer|intern|internship|manager|analyst|consultant|scientist|architect|lead|head|"
+    r"director|specialist|administrator|designer|researcher|assistant|technician|stagiaire|ingénieur|développeur)\b",
+    re.IGNORECASE
+)
+INSTITUTION_WORDS = re.compile(
+    r"\b(university|universit[ée]|school|[ée]cole|institute|institut|college|faculty|facult[ée]|academy|lyc[ée]e|polytechnic)\b",
+    re.IGNORECASE
+)
+
+MONTH = r"(?:jan|feb|fév|mar|apr|avr|may|mai|jun|juin|jul|juil|aug|aoû|sep|sept|oct|nov|dec|déc)[a-zéû]*\.?"
+DATE = rf"(?:{MONTH}\s+)?(?:19|20)\d{{2}}|\d{{1,2}}/(?:19|20)\d{{2}}"
+PRESENT = r"present|current|now|today|aujourd'hui|présent|en cours"
+DATE_RANGE = re.compile(rf"({DATE})\s*(?:-|–|—|to|à|au)\s*({DATE}|{PRESENT})", re.IGNORECASE)
+SINGLE_DATE = re.compile(rf"({DATE})", re.IGNORECASE)
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"\+?\d[\d ().-]{7,}\d")
+URL = re.compile(r"(?:https?://|www\.)\S+|(?:linkedin\.com|github\.com|gitlab\.com)/\S+", re.IGNORECASE)
+LOCATION = re.compile(r"\b([A-Z][A-Za-zÀ-ÿ'.-]+(?: [A-Z][A-Za-zÀ-ÿ'.-]+)*, ?[A-Z][A-Za-zÀ-ÿ'.-]+(?: [A-Z][A-Za-zÀ-ÿ'.-]+)*)\b")
+BULLET = re.compile(r"^[•◦●▪■‣∙·*–-]\s*")
+
+# Fields counted for coverage: a missing one means the cloud extractor should take the file
+COVERAGE_FIELDS = ("name", "email", "experience_or_education", "skills", "summary")
+
+
+# -------------------- Text Layout --------------------
+def pdf_lines(pdf_path):
+    """Lines of the PDF text layer in reading order, with column gaps kept as runs of spaces."""
+    reader = PdfReader(pdf_path)
+    lines = []
+    for page in reader.pages:
+        try:
+            text = page.extract_text(extraction_mode="layout") or ""
+        except Exception:
+            text = page.extract_text() or ""
+        lines.extend(line.rstrip() for line in text.splitlines())
+    # Drop blank lines and bare page numbers
+    return [line for line in lines if line.strip() and not line.strip().isdigit()]
+
+
+def split_columns(line):
+    """Split a layout line on wide gaps: "Company      Jul 2024 – Aug 2024" -> ["Company", "Jul 2024 – Aug 2024"]."""
+    return [part.strip() for part in re.split(r"\s{3,}", line.strip()) if part.strip()]
+
+
+def find_dates(text):
+    """Return (start_date, end_date, text without the dates)."""
+    match = DATE_RANGE.search(text)
+    if match:
+        end = match.group(2)
+        end = None if re.fullmatch(PRESENT, end, re.IGNORECASE) else end
+        return match.group(1), end, (text[:match.start()] + text[match.end():]).strip(" ,|–-()")
+    match = SINGLE_DATE.search(text)
+    if match:
+        return None, match.group(1), (text[:match.start()] + text[match.end():]).strip(" ,|–-()")
+    return None, None, text
+
+
+def heading_section(line):
+    key = re.sub(r"\s+", " ", line.strip().rstrip(":").strip()).lower()
+    return HEADING_TO_SECTION.get(key) if len(key) <= 40 else None
+
+
+# -------------------- Sections --------------------
+def split_sections(lines):
+    """Return (lines above the first heading, {section: lines})."""
+    header, sections = [], {}
+    current = None
+    for line in lines:
+        section = heading_section(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+        elif current is None:
+            header.append(line)
+        else:
+            sections[current].append(line)
+
+    # "Additional information" usually holds "Languages: ..." style lines
+    for line in sections.pop("additional", []):
+        label, _, value = line.strip().partition(":")
+        section = heading_section(label)
+        if section and value.strip():
+            sections.setdefault(section, []).append(value)
+    return header, sections
+
+
+def split_entries(lines):
+    """Group a section into entries. An entry starts at a non-bullet line that follows bullets or carries a date."""
+    entries = []
+    for line in lines:
+        text = line.strip()
+        is_bullet = bool(BULLET.match(text))
+        has_date = bool(DATE_RANGE.search(text) or SINGLE_DATE.search(text.split("   ")[-1]))
+        # Wrapped bullet text is indented deeper than the entry headers
+        is_continuation = not is_bullet and entries and entries[-1]["bullets"] and len(line) - len(line.lstrip()) > 4
+        if is_continuation:
+            previous = entries[-1]["bullets"][-1]
+            # Re-join words hyphenated across lines ("solv-" + "ing")
+            if previous.endswith("-") and text[:1].islower():
+                entries[-1]["bullets"][-1] = previous[:-1] + text
+            else:
+                entries[-1]["bullets"][-1] = previous + " " + text
+        elif is_bullet:
+            if not entries:
+                entries.append({"header": [], "bullets": []})
+            entries[-1]["bullets"].append(BULLET.sub("", text))
+        elif not entries or entries[-1]["bullets"] or has_date:
+            entries.append({"header": [text], "bullets": []})
+        else:
+            entries[-1]["header"].append(text)
+    return entries
+
+
+def entry_parts(entry):
+    """Header text without dates, start date, end date and description of an entry."""
+    start = end = None
+    header = []
+    for line in entry["header"]:
+        columns = split_columns(line)
+        for column in columns:
+            column_start, column_end, rest = find_dates(column)
+            if column_end or column_start:
+                start, end = start or column_start, end or column_end
+            if rest:
+                header.append(rest)
+    description = " ".join(" ".join(entry["bullets"]).split()) or None
+    return header, start, end, description
+
+
+def parse_experience(lines):
+    experience = []
+    for entry in split_entries(lines):
+        header, start, end, description = entry_parts(entry)
+        if not header:
+            continue
+        if len(header) == 1:
+            # "Title at Company" / "Title - Company" / "Title | Company"
+            parts = re.split(r"\s+(?:at|chez|@|\||-|–)\s+", header[0], maxsplit=1)
+            title, company = (parts + [""])[:2]
+        else:
+            company, title = header[0], header[1]
+            if TITLE_WORDS.search(company) and not TITLE_WORDS.search(title):
+                company, title = title, company
+        experience.append({"company": company, "title": title, "description": description, "start_date": start, "end_date": end})
+    return experience
+
+
+def parse_education(lines):
+    education = []
+    for entry in split_entries(lines):
+        header, start, end, description = entry_parts(entry)
+        if not header:
+            continue
+        institution = next((h for h in header if INSTITUTION_WORDS.search(h)), header[0])
+        degree = next((h for h in header if h != institution), description or "")
+        education.append({"institution": institution, "degree": degree, "start_date": start, "end_date": end})
+    return education
+
+
+def parse_items(lines):
+    """Entries as one string each: "Header (date): description"."""
+    items = []
+    for entry in split_entries(lines):
+        header, start, end, description = entry_parts(entry)
+        dates = f"{start} - {end or 'Present'}" if start else end or ""
+        text = ", ".join(h.rstrip(":") for h in header)
+        if dates:
+            text = f"{text} ({dates})" if text else dates
+        if description:
+            text = f"{text}: {description}" if text else description
+        if text:
+            items.append(text)
+    return items
+
+
+def parse_list(lines):
+    """Comma, pipe or bullet separated values."""
+    values = []
+    for line in lines:
+        for column in split_columns(BULLET.sub("", line.strip())):
+            values.extend(v.strip(" .;") for v in re.split(r"[,|;•·]", column))
+    return [v for v in values if v]
+
+
+def parse_skills(lines):
+    """Split "Category: a, b, c" lines into programming languages, frameworks and other skills."""
+    skills = {"programming_languages": [], "frameworks": [], "skills": []}
+    seen = set()
+    for line in lines:
+        _, _, values = line.strip().rpartition(":")
+        for value in parse_list([values]):
+            key = value.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in PROGRAMMING_LANGUAGES:
+                skills["programming_languages"].append(value)
+            elif key in FRAMEWORKS:
+                skills["frameworks"].append(value)
+            else:
+                skills["skills"].append(value)
+    return skills
+
+
+def parse_header(header):
+    """Name, email, phone, links and location from the lines above the first section."""
+    text = "   ".join(header)
+    email = EMAIL.search(text)
+    phone = PHONE.search(EMAIL.sub(" ", text))
+    links = [url.rstrip(".,;") for url in URL.findall(text)]
+
+    name = ""
+    for line in header:
+        candidate = split_columns(line)[0]
+        words = candidate.split()
+        if 2 <= len(words) <= 5 and all(re.fullmatch(r"[A-Za-zÀ-ÿ'.-]+", w) for w in words):
+            name = " ".join(words)
+            break
+
+    location = ""
+    for line in header:
+        for column in split_columns(line):
+            if EMAIL.search(column) or PHONE.search(column):
+                continue
+            match = LOCATION.search(column)
+            if match:
+                location = match.group(1)
+                break
+        if location:
+            break
+
+    return {
+        "name": name,
+        "email": email.group(0) if email else "",
+        "phone": " ".join(phone.group(0).split()) if phone else "",
+        "links": links,
+        "location": location
+    }
+
+
+# -------------------- Extraction --------------------
+def parse_pdf(pdf_path):
+    """Fill the Resume schema from the PDF text layer. Returns (resume dict, quality dict).
+
+    Runs in worker processes, so it only depends on pypdf and the schema.
+    """
+    lines = pdf_lines(pdf_path)
+    text_chars = sum(len(line.strip()) for line in lines)
+    header, sections = split_sections(lines)
+
+    data = parse_header(header)
+    data.update({
+        "experience": parse_experience(sections.get("experience", [])),
+        "education": parse_education(sections.get("education", [])),
+        "technical_skills": parse_skills(sections.get("skills", [])),
+        "key_accomplishments": "",
+        "certifications": parse_items(sections.get("certifications", [])),
+        "projects": parse_items(sections.get("projects", [])),
+        "languages": parse_list(sections.get("languages", [])),
+        "interests": parse_list(sections.get("interests", [])),
+        "hobbies": parse_list(sections.get("hobbies", [])),
+        "awards": parse_items(sections.get("awards", [])),
+        "volunteer_experience": parse_items(sections.get("volunteer_experience", [])),
+        "references": parse_items(sections.get("references", [])),
+        "summary": " ".join(" ".join(sections.get("summary", [])).split())
+    })
+    data = Resume(**data).model_dump()
+
+    filled = {
+        "name": bool(data["name"]),
+        "email": bool(data["email"]),
+        "experience_or_education": bool(data["experience"] or data["education"]),
+        "skills": any(data["technical_skills"].values()),
+        "summary": bool(data["summary"])
+    }
+    body_lines = len(lines) - len(header)
+    section_lines = sum(len(v) for v in sections.values()) + len(sections)
+    quality = {
+        "text_chars": text_chars,
+        "coverage": round(sum(filled.values()) / len(COVERAGE_FIELDS), 2),
+        # Share of the body that landed under a recognized heading (a big header block means headings were missed)
+        "confidence": round(min(1.0, section_lines / body_lines), 2) if body_lines > 0 and text_chars >= MIN_TEXT_CHARS else 0.0,
+        "missing": [field for field, ok in filled.items() if not ok]
+    }
+    return data, quality
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared process pool, one worker per core. Spawned so it is safe from Streamlit's threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def reset_pool(pool):
+    """Drop a pool whose workers died so the next get_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LocalExtractor(Extractor):
+    """Layout heuristics over the PDF text layer, parsed in a process pool. No network."""
+    name = "Local (pypdf)"
+
+    def __init__(self, min_coverage=DEFAULT_MIN_COVERAGE, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        self.min_coverage = min_coverage
+        self.min_confidence = min_confidence
+
+    def extract(self, pdf_path):
+        """Raises LowQualityExtraction for weak results; corrupt or encrypted PDFs raise pypdf's own errors."""
+        pool = get_pool()
+        try:
+            data, quality = pool.submit(parse_pdf, str(pdf_path)).result()
+        except BrokenProcessPool:
+            # A worker crashed: later files get a new pool instead of failing on this one
+            reset_pool(pool)
+            raise
+        # Name and email identify the candidate in cvs.db, so they are always required
+        if (
+            quality["coverage"] < self.min_coverage
+            or quality["confidence"] < self.min_confidence
+            or "name" in quality["missing"]
+            or "email" in quality["missing"]
+        ):
+            raise LowQualityExtraction(quality)
+        return data
@@ -1,14 +1,147 @@
 import os
 import json
+import time
+import re
+import queue
+import pandas as pd
 import streamlit as st
-import requests
+import ollama_client
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from json_stream import RequirementStreamParser, MalformedStreamError
+from resume_index import update_index, requirements_to_query
+from resume_compact import compact_resume
+from scoring import compute_score
+from match_prompts import build_shared_prefix, build_match_prompt, extract_timings, score_result
+from job_spec import parse_requirements, requirements_to_job_text
+from embeddings import (
+    EMBED_MODEL, DEFAULT_FULL_THRESHOLD, DEFAULT_NONE_THRESHOLD, create_embeddings_db, triage_requirements
+)
+from match_cache import (
+    DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_SIZE_MB, make_cache_key, make_resume_hash, normalize_requirement, create_cache,
+    get_cached_result, save_cached_result, get_requirement_matches, save_requirement_matches,
+    evict_cache, clear_cache, cache_stats
+)
+
+MODEL_NAME = "Llama3:latest"
+SMALL_MODEL_OPTIONS = ["gemma:2b", "mistral:latest"]
+# Bump whenever the matching prompt changes so cached results are not reused
+PROMPT_VERSION = "1"
+
+PROMPT_LAYOUTS = {
+    "resume_first": "Resume first (original)",
+    "prefix_first": "Shared prefix first (instructions + job, then resume)"
+}
 
 # Set page config
 st.set_page_config(page_title="Resume Matching", layout="wide")
 st.title("📄 Resume Matching with Job Description (Batch)")
 
+# Function to preload a model once per server process
+@st.cache_resource(show_spinner=False)
+def warm_up_model(model, keep_alive):
+    return ollama_client.warm_up(model, keep_alive)
+
+# Sidebar: batch settings
+with st.sidebar:
+    st.header("⚙️ Batch Settings")
+    max_workers = st.slider(
+        "Parallel Ollama requests",
+        min_value=1, max_value=16, value=4,
+        help="Maximum number of in-flight /api/generate calls. Keep it at or below OLLAMA_NUM_PARALLEL on the Ollama host."
+    )
+
+    st.subheader("🧠 Prompt Layout")
+    layout = st.selectbox(
+        "Layout",
+        list(PROMPT_LAYOUTS.keys()),
+        format_func=lambda x: PROMPT_LAYOUTS[x],
+        index=1,
+        help="Putting the instructions and job description first lets Ollama reuse the evaluated prefix for every candidate."
+    )
+    keep_alive = st.text_input("Keep model loaded for (keep_alive)", value="30m")
+    stream_output = st.checkbox(
+        "Stream requirements as they are generated",
+        value=True,
+        help="Shows each requirement as soon as the model finishes it and stops generation early on malformed output."
+    )
+
+    st.subheader("🔎 Lexical Pre-filter")
+    use_prefilter = st.checkbox(
+        "Shortlist resumes before LLM matching",
+        value=False,
+        help="Ranks parsed resumes with a BM25 index over skills, experience and projects; only the shortlist reaches Llama3."
+    )
+    prefilter_top_k = st.number_input("Top-K resumes", min_value=1, value=50)
+    prefilter_min_score = st.slider(
+        "Min score (fraction of best)", 0.0, 1.0, 0.2, 0.05,
+        help="Resumes scoring below this fraction of the best candidate's score are skipped."
+    )
+
+    st.subheader("✂️ Resume Compaction")
+    use_compaction = st.checkbox(
+        "Compact resumes in the prompt",
+        value=True,
+        help="Drops empty and irrelevant fields (contact details, hobbies, references...) and removes JSON indentation."
+    )
+    token_budget = st.number_input(
+        "Resume token budget (0 = no truncation)", min_value=0, value=0, step=100,
+        help="Opt-in: long descriptions are shortened until the resume fits this estimated number of tokens. "
+             "Truncation removes resume content and can change scores."
+    )
+
+    st.subheader("🧩 Delta Matching")
+    use_delta = st.checkbox(
+        "Reuse results per requirement",
+        value=True,
+        help="Applies when the job file is a job requirements JSON export. Weight-only edits need no LLM call; "
+             "added or renamed requirements are evaluated alone and merged into the existing results."
+    )
+
+    st.subheader("🧬 Embedding Triage")
+    use_triage = st.checkbox(
+        "Decide clear FULL/NONE matches with embeddings",
+        value=False,
+        help="Needs a job requirements JSON export. Only ambiguous requirements are sent to the LLM."
+    )
+    embed_model = st.text_input("Embedding model", value=EMBED_MODEL)
+    full_threshold = st.slider("FULL above similarity", 0.0, 1.0, DEFAULT_FULL_THRESHOLD, 0.01)
+    none_threshold = st.slider("NONE below similarity", 0.0, 1.0, DEFAULT_NONE_THRESHOLD, 0.01)
+
+    st.subheader("🪜 Model Cascade")
+    use_cascade = st.checkbox(
+        "Triage with a small model first",
+        value=False,
+        help=f"Every resume is scored by the small model; only borderline scores are re-evaluated by {MODEL_NAME}."
+    )
+    small_model = st.selectbox("Small model", SMALL_MODEL_OPTIONS)
+    band_low, band_high = st.slider("Uncertainty band (score)", 0, 100, (35, 75))
+    run_baseline = st.checkbox(
+        f"Also run {MODEL_NAME} on everyone to measure agreement",
+        value=False,
+        help="Slow: defeats the purpose of the cascade. Without it, agreement uses cached large-model results only."
+    )
+
+    st.subheader("🔥 Model Warm-up")
+    for model in [MODEL_NAME] + ([small_model] if use_cascade else []):
+        try:
+            load_time = warm_up_model(model, keep_alive)
+            st.caption(f"🔥 {model} preloaded ({load_time:.1f}s at startup)")
+        except Exception as e:
+            st.warning(f"⚠️ Could not preload {model}: {str(e)}")
+
+    st.subheader("🗃️ Match Cache")
+    create_cache()
+    use_cache = st.checkbox("Reuse cached matches", value=True)
+    max_age_days = st.number_input("Max age (days)", min_value=1, value=DEFAULT_MAX_AGE_DAYS)
+    max_size_mb = st.number_input("Max size (MB)", min_value=1, value=DEFAULT_MAX_SIZE_MB)
+    entries, size = cache_stats()
+    st.caption(f"{entries} cached matches · {size / (1024 * 1024):.1f} MB")
+    if st.button("🧹 Clear cache"):
+        clear_cache()
+        st.success("Cache cleared.")
+
 # Upload Job Description
-job_file = st.file_uploader("📄 Upload Job Description File", type=["txt", "pdf"])
+job_file = st.file_uploader("📄 Upload Job Description File", type=["json", "txt", "pdf"])
 
 # Function to read file content
 def read_file(file):
@@ -16,60 +149,416 @@ def read_file(file):
         return file.read().decode("utf-8", errors="ignore")
     return ""
 
+# Function to load the model and evaluate the shared prefix once before the batch starts
+def prime_shared_prefix(job_text, keep_alive, model=MODEL_NAME):
+    start = time.time()
+    response = ollama_client.post(
+        "/api/generate",
+        {
+            "model": model,
+            "prompt": build_shared_prefix(job_text),
+            "stream": False,
+            "keep_alive": keep_alive,
+            "options": {"num_predict": 1}
+        }
+    )
+    response.raise_for_status()
+    return extract_timings(response.json(), time.time() - start)
+
 # Function to run Llama3 request
-def match_resume_with_job(resume_text, job_text):
-    prompt = f"""
-
-You are an AI assistant designed to evaluate how well a candidate fits a specific job role based on their resume and a structured job description. The job description includes multiple requirement categories, each with an importance weight. Your task is to extract claims about how well the candidate meets each requirement and present them in a structured JSON format.
-
-## Instructions:
-
-1. Analyze the **Resume Data** and the **Job Description Data** provided below.
-2. For each requirement (skill, education, experience, soft skill, etc.) in the job description, evaluate the degree to which the candidate meets the requirement based on the resume.
-3. For each requirement, extract and return the following fields:
-   - **requirement**: the original job requirement or skill.
-   - **match**: choose one of the following: "FULL", "PARTIAL","NEAR FULL" or "NONE".
-   - **evidence**: a short explanation or quote from the resume that supports your evaluation.
-   - **source**: "RESUME" if the evidence is explicitly present in the resume or "Inference"
-   - **importance**: put the corresponding weight from the job description file
-PLEASE MAKE SURE TO PUT ONLY THINGS THAT OCCUR IN THE RESUME DATA and Be very critical in your assessment.
-4. Output the result in this JSON format:
-[
-  {{
-    "requirement": "",
-    "match": "",
-    "evidence": "",
-    "source": "",
-    "importance": 0.0
-  }},
-  ...
-]
-PLEASE MAKE SURE TO GIVE THE EXACT JSON FORMAT IN THE OUTPUT .
-MAKE SURE to evaluate the candidate's fit for ALL requirements, including soft skills and penalties.
-Mention the penalties that should be applied according to the job description penalties and the match with the resume
-## Resume Data:
-{resume_text}
-
-## Job Description Data:
-{job_text}
-
-"""
+def match_resume_with_job(resume_text, job_text, layout="resume_first", keep_alive=None, model=MODEL_NAME, with_ids=False):
+    prompt = build_match_prompt(resume_text, job_text, layout, with_ids)
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False
+    }
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
 
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "Llama3:latest",
-                "prompt": prompt,
-                "stream": False
-            }
-        )
+        start = time.time()
+        response = ollama_client.post("/api/generate", payload)
         if response.status_code == 200:
-            return response.json()["response"]
+            data = response.json()
+            return data["response"], extract_timings(data, time.time() - start)
         else:
-            return f"❌ Error: {response.status_code}"
+            return f"❌ Error: {response.status_code}", {}
     except Exception as e:
-        return f"❌ Exception: {str(e)}"
+        return f"❌ Exception: {str(e)}", {}
+
+# Function to run a streamed Llama3 request, parsing requirement objects as they arrive
+def match_resume_with_job_streaming(resume_text, job_text, layout="resume_first", keep_alive=None, on_item=None,
+                                    model=MODEL_NAME, with_ids=False):
+    prompt = build_match_prompt(resume_text, job_text, layout, with_ids)
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True
+    }
+    if keep_alive:
+        payload["keep_alive"] = keep_alive
+
+    parser = RequirementStreamParser()
+    chunks = []
+    try:
+        start = time.time()
+        response = ollama_client.post("/api/generate", payload, stream=True)
+        if response.status_code != 200:
+            return f"❌ Error: {response.status_code}", {}
+        with response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                token = data.get("response", "")
+                chunks.append(token)
+                try:
+                    for item in parser.feed(token):
+                        if on_item:
+                            on_item(item)
+                except MalformedStreamError as e:
+                    # Leaving the with-block closes the connection, which makes Ollama stop generating
+                    return f"❌ Malformed output after {len(parser.items)} requirements: {str(e)}", {}
+                if data.get("done"):
+                    return "".join(chunks), extract_timings(data, time.time() - start)
+        return "".join(chunks), {}
+    except Exception as e:
+        return f"❌ Exception: {str(e)}", {}
+
+# Function to serialize a resume for the prompt, compacted or as the original indented JSON
+def resume_to_text(resume_json, settings):
+    if settings["compact"]:
+        return compact_resume(resume_json, settings["token_budget"])
+    return json.dumps(resume_json, indent=2, ensure_ascii=False), {}
+
+# Function to run the LLM on a resume with the selected layout and streaming mode
+def run_llm_match(resume_text, job_text, settings, on_item=None, with_ids=False):
+    if settings["stream"]:
+        return match_resume_with_job_streaming(
+            resume_text, job_text, settings["layout"], settings["keep_alive"], on_item, settings["model"], with_ids
+        )
+    return match_resume_with_job(
+        resume_text, job_text, settings["layout"], settings["keep_alive"], settings["model"], with_ids
+    )
+
+# Function to combine embedding decisions with an LLM evaluation of the ambiguous requirements only
+def match_with_triage(resume_json, triage, settings, on_item=None):
+    records = list(triage["decided"])
+    if on_item:
+        for record in records:
+            on_item(record)
+    metrics = {}
+    if triage["ambiguous"] and settings.get("delta"):
+        result, metrics = match_delta(resume_json, triage["ambiguous"], settings, on_item)
+        if result.startswith("❌"):
+            return result, metrics
+        records.extend(json.loads(result))
+    elif triage["ambiguous"]:
+        resume_text, _ = resume_to_text(resume_json, settings)
+        job_text = requirements_to_job_text(settings["job_type"], triage["ambiguous"])
+        result, metrics = run_llm_match(resume_text, job_text, settings, on_item)
+        if result.startswith("❌"):
+            return result, metrics
+        json_match = re.search(r"\[.*\]", result, re.DOTALL)
+        try:
+            records.extend(json.loads(json_match.group(0)))
+        except (AttributeError, json.JSONDecodeError):
+            return "❌ Error: invalid JSON returned for the ambiguous requirements", metrics
+    return json.dumps(records, indent=2, ensure_ascii=False), metrics
+
+# Function to evaluate requirements one pair at a time, reusing stored (requirement, resume) results
+# ("Reuse cached matches" off: nothing is read from or written to the per-requirement store)
+def match_delta(resume_json, items, settings, on_item=None):
+    resume_hash = make_resume_hash(resume_json)
+    prompt_version = prompt_version_for(settings)
+    stored = {}
+    if settings["use_cache"]:
+        stored = get_requirement_matches(
+            resume_hash, [item["label"] for item in items], settings["model"], prompt_version, settings["max_age_days"]
+        )
+    missing = [item for item in items if normalize_requirement(item["label"]) not in stored]
+    if on_item:
+        for record in stored.values():
+            on_item(record)
+    metrics = {}
+    if missing:
+        resume_text, _ = resume_to_text(resume_json, settings)
+        # Each requirement is sent with an id ("R1", "R2"...) the model echoes back, so a reworded
+        # requirement or an extra penalty record does not lose the answer
+        job_text = requirements_to_job_text(settings["job_type"], missing, with_ids=True)
+        result, metrics = run_llm_match(resume_text, job_text, settings, on_item, with_ids=True)
+        if result.startswith("❌"):
+            return result, metrics
+        json_match = re.search(r"\[.*\]", result, re.DOTALL)
+        try:
+            records = [r for r in json.loads(json_match.group(0)) if isinstance(r, dict)]
+        except (AttributeError, json.JSONDecodeError):
+            return "❌ Error: invalid JSON returned for the new requirements", metrics
+        by_id = {str(r.get("id", "")).strip().upper(): r for r in records if r.get("id")}
+        by_label = {normalize_requirement(str(r.get("requirement", ""))): r for r in records}
+        new_records = {}
+        for position, item in enumerate(missing, start=1):
+            # Echoed id first, then the unchanged label for a model that dropped the ids
+            record = by_id.get(f"R{position}") or by_label.get(normalize_requirement(item["label"]))
+            if record is not None:
+                new_records[item["label"]] = {
+                    "requirement": item["label"],
+                    "match": record.get("match", "MISSING"),
+                    "evidence": record.get("evidence", ""),
+                    "source": record.get("source", "")
+                }
+        if settings["use_cache"]:
+            save_requirement_matches(resume_hash, new_records, settings["model"], prompt_version)
+        stored.update({normalize_requirement(label): record for label, record in new_records.items()})
+
+    # Importance always comes from the current job requirements, so weight edits need no LLM call
+    merged = []
+    for item in items:
+        record = stored.get(normalize_requirement(item["label"]))
+        if record is None:
+            record = {"requirement": item["label"], "match": "MISSING", "evidence": "", "source": ""}
+        merged.append(dict(record, requirement=item["label"], importance=item["weight"]))
+    metrics["delta"] = {"reused": len(items) - len(missing), "evaluated": len(missing)}
+    return json.dumps(merged, indent=2, ensure_ascii=False), metrics
+
+# Function to build the prompt version for the current layout and compaction settings
+def prompt_version_for(settings):
+    # The original layout keeps the original prompt version so existing cache entries stay valid
+    prompt_version = PROMPT_VERSION if settings["layout"] == "resume_first" else f"{PROMPT_VERSION}-{settings['layout']}"
+    if settings["compact"]:
+        prompt_version += f"-compact-{settings['token_budget']}"
+    return prompt_version
+
+# Function to build the cache key of a resume/job pair for the current settings
+def match_cache_key(resume_json, job_text, settings):
+    prompt_version = prompt_version_for(settings)
+    if settings.get("triage") is not None:
+        prompt_version += f"-embed-{settings['embed_model']}-{settings['full_threshold']}-{settings['none_threshold']}"
+    return make_cache_key(resume_json, job_text, settings["model"], prompt_version)
+
+# Function to match one resume and save its result (runs in a worker thread, no Streamlit calls here)
+def process_resume(file, job_text, settings, on_item=None):
+    resume_path = os.path.join("parsed_json", file)
+    with open(resume_path, "r", encoding="utf-8") as f:
+        resume_json = json.load(f)
+
+    triage = settings.get("triage")
+    cache_key = match_cache_key(resume_json, job_text, settings)
+    # In delta mode the per-requirement store replaces the whole-pair cache
+    use_pair_cache = settings["use_cache"] and not settings.get("delta")
+    result = get_cached_result(cache_key, settings["max_age_days"]) if use_pair_cache else None
+    cache_hit = result is not None
+    metrics = {}
+    if not cache_hit:
+        if triage is not None:
+            result, metrics = match_with_triage(resume_json, triage[file], settings, on_item)
+            compact_stats = {}
+        elif settings.get("delta"):
+            result, metrics = match_delta(resume_json, settings["items"], settings, on_item)
+            compact_stats = {}
+        else:
+            resume_text, compact_stats = resume_to_text(resume_json, settings)
+            result, metrics = run_llm_match(resume_text, job_text, settings, on_item)
+        if metrics and compact_stats:
+            # Estimated prompt-processing time saved, from this call's own per-token prompt eval rate
+            per_token = metrics["prompt_eval_s"] / metrics["prompt_tokens"] if metrics["prompt_tokens"] else 0.0
+            metrics.update(compact_stats)
+            metrics["est_saved_s"] = compact_stats["saved_tokens"] * per_token
+        # Only keep real model answers, not error messages
+        if use_pair_cache and not result.startswith("❌"):
+            save_cached_result(cache_key, result)
+        # In delta mode a resume whose requirements were all reused never reached Ollama
+        if metrics.get("delta", {}).get("evaluated") == 0 and not result.startswith("❌"):
+            cache_hit = True
+
+    # Save result to file
+    if settings.get("write_results", True):
+        result_filename = file.replace(".json", "_match.json")
+        result_path = os.path.join("matching_results", result_filename)
+        with open(result_path, "w", encoding="utf-8") as out_file:
+            out_file.write(result)
+    return result, cache_hit, metrics
+
+# Function to match all resumes with a bounded number of in-flight requests
+def run_batch_matching(resume_files, job_text, max_workers, settings):
+    total = len(resume_files)
+    progress_bar = st.progress(0.0)
+    stats = st.empty()
+    start_time = time.time()
+    done = 0
+    hits = 0
+    latencies = {}
+    results = {}
+    delta_totals = {"reused": 0, "evaluated": 0}
+
+    # Worker threads cannot call Streamlit, so streamed requirements go through a queue
+    item_queue = queue.Queue()
+    expanders = {}
+
+    def get_expander(file):
+        if file not in expanders:
+            expanders[file] = st.expander(f"📄 {file} Match Result", expanded=settings["stream"])
+        return expanders[file]
+
+    def show_streamed_items():
+        while not item_queue.empty():
+            file, item = item_queue.get()
+            with get_expander(file):
+                st.markdown(f"- **{item.get('requirement', '')}** → `{item.get('match', '')}` · {item.get('evidence', '')}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                process_resume, file, job_text, settings,
+                lambda item, file=file: item_queue.put((file, item))
+            ): file
+            for file in resume_files
+        }
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            show_streamed_items()
+            for future in finished:
+                file = futures[future]
+                done += 1
+                elapsed = time.time() - start_time
+                rate = done / elapsed if elapsed > 0 else 0.0
+                remaining = (total - done) / rate if rate > 0 else 0.0
+                progress_bar.progress(done / total)
+                stats.markdown(
+                    f"**{done}/{total}** resumes matched · ⏱️ {elapsed:.1f}s elapsed · "
+                    f"🚀 {rate * 60:.1f} resumes/min · ⌛ ~{remaining:.0f}s remaining · 🗃️ {hits} cache hits"
+                )
+
+                try:
+                    result, cache_hit, metrics = future.result()
+                except Exception as e:
+                    st.warning(f"❌ Error with {file}: {str(e)}")
+                    continue
+
+                results[file] = result
+                for key, value in metrics.pop("delta", {}).items():
+                    delta_totals[key] += value
+                if cache_hit:
+                    hits += 1
+                    st.success(f"✅ Match complete for: {file} (cached)")
+                elif result.startswith("❌"):
+                    st.warning(f"{result} ({file})")
+                else:
+                    st.success(f"✅ Match complete for: {file}")
+                    if "ttft_s" in metrics:
+                        latencies[file] = metrics
+                with get_expander(file):
+                    st.text_area("🔍 Output", result, height=300, key=f"output_{settings.get('stage', '')}{file}")
+
+    return {
+        "duration": time.time() - start_time,
+        "hits": hits,
+        "latencies": latencies,
+        "results": results,
+        "delta": delta_totals
+    }
+
+# Function to show per-resume latency and how much it drops across the batch
+def show_latency_report(latencies, layout, prime_metrics=None):
+    if not latencies:
+        return
+    st.subheader("⏱️ Latency per Resume")
+    df = pd.DataFrame.from_dict(latencies, orient="index").sort_values("total_s", ascending=False)
+    # Reference is the cold prefix evaluation when priming was done, else the slowest call of the batch
+    reference = prime_metrics or df.iloc[0].to_dict()
+    df["ttft_drop_%"] = (1 - df["ttft_s"] / reference["ttft_s"]) * 100 if reference["ttft_s"] else 0.0
+    df["total_drop_%"] = (1 - df["total_s"] / reference["total_s"]) * 100 if reference["total_s"] else 0.0
+    st.dataframe(df.round(3), use_container_width=True)
+    st.caption(
+        f"Layout: {PROMPT_LAYOUTS[layout]} · mean TTFT {df['ttft_s'].mean():.2f}s · "
+        f"mean total {df['total_s'].mean():.2f}s · mean prompt tokens evaluated {df['prompt_tokens'].mean():.0f}"
+    )
+    if "saved_tokens" in df:
+        st.caption(
+            f"✂️ Compaction saved {df['saved_tokens'].sum():.0f} estimated tokens "
+            f"({df['saved_tokens'].sum() / df['original_tokens'].sum():.0%} of the resume text) · "
+            f"~{df['est_saved_s'].mean():.2f}s prompt-processing time saved per resume (estimate from the "
+            f"prompt eval rate, not measured; python bench_models.py --compact measures it)"
+        )
+
+    # Compare with the last run that used the other layout
+    runs = st.session_state.setdefault("latency_runs", {})
+    runs[layout] = latencies
+    if len(runs) == 2:
+        baseline = pd.DataFrame.from_dict(runs["resume_first"], orient="index")
+        prefix = pd.DataFrame.from_dict(runs["prefix_first"], orient="index")
+        both = baseline[["ttft_s", "total_s"]].join(prefix[["ttft_s", "total_s"]], lsuffix="_resume_first", rsuffix="_prefix_first", how="inner")
+        if not both.empty:
+            both["ttft_drop_%"] = (1 - both["ttft_s_prefix_first"] / both["ttft_s_resume_first"]) * 100
+            both["total_drop_%"] = (1 - both["total_s_prefix_first"] / both["total_s_resume_first"]) * 100
+            st.subheader("📉 Prefix-first vs Resume-first (last run of each)")
+            st.dataframe(both.round(3), use_container_width=True)
+            st.caption(
+                f"Median TTFT drop {both['ttft_drop_%'].median():.1f}% · "
+                f"median total latency drop {both['total_drop_%'].median():.1f}%"
+            )
+
+# Function to score a resume from the per-requirement store (None unless every requirement is stored)
+def delta_cached_score(resume_json, items, settings):
+    stored = get_requirement_matches(
+        make_resume_hash(resume_json), [item["label"] for item in items], settings["model"],
+        prompt_version_for(settings), settings["max_age_days"]
+    )
+    records = [stored.get(normalize_requirement(item["label"])) for item in items]
+    if not records or any(record is None for record in records):
+        return None
+    return compute_score([dict(record, importance=item["weight"]) for record, item in zip(records, items)])
+
+# Function to look up cached large-model results without calling Ollama
+def cached_scores(resume_files, job_text, settings):
+    scores = {}
+    for file in resume_files:
+        with open(os.path.join("parsed_json", file), "r", encoding="utf-8") as f:
+            resume_json = json.load(f)
+        # Delta runs only fill the per-requirement store, not the whole-pair cache
+        if settings.get("delta"):
+            score = delta_cached_score(resume_json, settings["items"], settings)
+        else:
+            result = get_cached_result(match_cache_key(resume_json, job_text, settings), settings["max_age_days"])
+            score = score_result(result) if result is not None else None
+        if score is not None:
+            scores[file] = score
+    return scores
+
+# Function to report avoided large-model calls and ranking agreement with the large-model-only baseline
+def show_cascade_report(small_scores, borderline, large_scores, baseline_scores):
+    total = len(small_scores)
+    st.subheader("🪜 Cascade Report")
+    if total == 0:
+        st.warning("No resume was scored by the small model, so there is nothing to report.")
+        return
+    st.info(
+        f"{total - len(borderline)}/{total} large-model calls avoided "
+        f"({(total - len(borderline)) / total:.0%}) · {len(borderline)} borderline resumes re-evaluated"
+    )
+    cascade_scores = {file: large_scores.get(file, score) for file, score in small_scores.items()}
+    df = pd.DataFrame({
+        "Small model": pd.Series(small_scores, dtype=float),
+        "Cascade": pd.Series(cascade_scores, dtype=float),
+        "Large model baseline": pd.Series(baseline_scores, dtype=float)
+    })
+    df["Re-evaluated"] = df.index.isin(borderline)
+    compared = df.dropna(subset=["Cascade", "Large model baseline"])
+    if len(compared) >= 2:
+        # Spearman's rho is the Pearson correlation of the ranks
+        spearman = compared["Cascade"].rank().corr(compared["Large model baseline"].rank())
+        k = min(10, len(compared))
+        top_cascade = set(compared["Cascade"].nlargest(k).index)
+        top_baseline = set(compared["Large model baseline"].nlargest(k).index)
+        st.caption(
+            f"Agreement with the {MODEL_NAME}-only baseline on {len(compared)} resumes: "
+            f"Spearman ρ = {spearman:.2f} · top-{k} overlap {len(top_cascade & top_baseline)}/{k}"
+        )
+    else:
+        st.caption("Not enough large-model baseline results to measure agreement.")
+    st.dataframe(df.sort_values("Cascade", ascending=False).round(2), use_container_width=True)
 
 # On button click
 if st.button("🔍 Run Matching for All Resumes"):
@@ -84,24 +573,126 @@ if st.button("🔍 Run Matching for All Resumes"):
             resume_files = [f for f in os.listdir("parsed_json") if f.endswith(".json")]
             if not resume_files:
                 st.warning("⚠️ No resumes found in 'parsed_json'.")
-            else:
+            elif use_prefilter:
+                start = time.time()
+                index = update_index("parsed_json")
+                ranked = index.search(requirements_to_query(job_text), prefilter_top_k, prefilter_min_score)
+                elapsed_ms = (time.time() - start) * 1000
+                st.info(f"🔎 Pre-filter kept {len(ranked)}/{len(resume_files)} resumes in {elapsed_ms:.1f} ms")
+                with st.expander("🔎 Shortlist"):
+                    st.dataframe(pd.DataFrame(ranked, columns=["Resume", "BM25 Score"]), use_container_width=True)
+                resume_files = [file for file, _ in ranked]
+                if not resume_files:
+                    st.warning("⚠️ No resume matches the job requirements' keywords.")
+
+            if resume_files:
                 os.makedirs("matching_results", exist_ok=True)
-                with st.spinner("⏳ Matching in progress..."):
-                    for file in resume_files:
-                        resume_path = os.path.join("parsed_json", file)
-                        with open(resume_path, "r", encoding="utf-8") as f:
-                            resume_json = json.load(f)
-                        resume_text = json.dumps(resume_json, indent=2, ensure_ascii=False)
-                        result = match_resume_with_job(resume_text, job_text)
-
-                        # Save result to file
-                        result_filename = file.replace(".json", "_match.json")
-                        result_path = os.path.join("matching_results", result_filename)
-                        with open(result_path, "w", encoding="utf-8") as out_file:
-                            out_file.write(result)
-
-                        st.success(f"✅ Match complete for: {file}")
-                        with st.expander(f"📄 {file} Match Result"):
-                            st.text_area("🔍 Output", result, height=300)
-
-                st.success("🎉 All resume matches complete!")
+                settings = {
+                    "use_cache": use_cache,
+                    "max_age_days": max_age_days,
+                    "layout": layout,
+                    "keep_alive": keep_alive,
+                    "stream": stream_output,
+                    "compact": use_compaction,
+                    "token_budget": token_budget,
+                    "model": MODEL_NAME
+                }
+                if use_delta:
+                    # Only a job requirements JSON export can be matched per requirement; plain text is matched whole
+                    job_type, items = parse_requirements(job_text)
+                    if items:
+                        settings.update({"delta": True, "items": items, "job_type": job_type})
+                if use_triage:
+                    job_type, items = parse_requirements(job_text)
+                    if not items:
+                        st.warning("⚠️ Embedding triage needs a job requirements JSON export; running the full LLM match instead.")
+                    else:
+                        resumes = {}
+                        for file in resume_files:
+                            with open(os.path.join("parsed_json", file), "r", encoding="utf-8") as f:
+                                resumes[file] = json.load(f)
+                        with st.spinner("🧬 Computing requirement/resume similarities..."):
+                            try:
+                                create_embeddings_db()
+                                triage, triage_stats = triage_requirements(
+                                    resumes, items, embed_model, full_threshold, none_threshold
+                                )
+                                settings.update({
+                                    "triage": triage,
+                                    "job_type": job_type,
+                                    "embed_model": embed_model,
+                                    "full_threshold": full_threshold,
+                                    "none_threshold": none_threshold
+                                })
+                                decided = triage_stats["full"] + triage_stats["none"]
+                                fully_decided = sum(1 for t in triage.values() if not t["ambiguous"])
+                                st.info(
+                                    f"🧬 {decided}/{triage_stats['pairs']} requirement/resume pairs decided by embeddings "
+                                    f"({triage_stats['full']} FULL, {triage_stats['none']} NONE) · "
+                                    f"{fully_decided} resumes need no LLM call · {triage_stats['embedded']} new texts embedded"
+                                )
+                            except Exception as e:
+                                st.warning(f"⚠️ Embedding triage failed, running the full LLM match instead: {str(e)}")
+                if use_cascade:
+                    small_settings = dict(settings, model=small_model, stage="small_")
+                    st.subheader(f"1️⃣ Triage with {small_model}")
+                    with st.spinner(f"⏳ Scoring every resume with {small_model}..."):
+                        small_run = run_batch_matching(resume_files, job_text, max_workers, small_settings)
+                    small_scores = {file: score_result(result) for file, result in small_run["results"].items()}
+                    # Invalid small-model outputs are treated as borderline
+                    borderline = [
+                        file for file, score in small_scores.items()
+                        if score is None or band_low <= score <= band_high
+                    ]
+                    resume_files = borderline
+                    settings["stage"] = "large_"
+                    st.subheader(f"2️⃣ Re-evaluating {len(borderline)} borderline resumes with {MODEL_NAME}")
+
+                prime_metrics = None
+                if resume_files and layout == "prefix_first":
+                    with st.spinner("🔥 Loading the model and evaluating the shared prefix..."):
+                        try:
+                            prime_metrics = prime_shared_prefix(job_text, keep_alive, MODEL_NAME)
+                            st.caption(f"🔥 Shared prefix ready in {prime_metrics['total_s']:.2f}s ({prime_metrics['prompt_tokens']} tokens)")
+                        except Exception as e:
+                            st.warning(f"⚠️ Could not prime the shared prefix: {str(e)}")
+                with st.spinner(f"⏳ Matching in progress ({max_workers} parallel requests)..."):
+                    run = run_batch_matching(resume_files, job_text, max_workers, settings)
+                    evicted = evict_cache(max_age_days, max_size_mb)
+
+                st.success(f"🎉 All resume matches complete in {run['duration']:.1f}s!")
+                if resume_files:
+                    st.info(
+                        f"🗃️ Cache hit rate: {run['hits']}/{len(resume_files)} ({run['hits'] / len(resume_files):.0%}) · "
+                        f"{len(resume_files) - run['hits']} sent to Ollama · {evicted} entries evicted"
+                    )
+                if settings.get("delta"):
+                    pairs = run["delta"]["reused"] + run["delta"]["evaluated"]
+                    st.info(
+                        f"🧩 {run['delta']['reused']}/{pairs} requirement/resume pairs reused · "
+                        f"{run['delta']['evaluated']} evaluated by the LLM"
+                    )
+                show_latency_report(run["latencies"], layout, prime_metrics)
+
+                if use_cascade:
+                    large_scores = {file: score_result(result) for file, result in run["results"].items()}
+                    large_scores = {file: score for file, score in large_scores.items() if score is not None}
+                    others = [file for file in small_scores if file not in large_scores]
+                    if run_baseline and others:
+                        with st.spinner(f"⏳ Running the {MODEL_NAME} baseline on the remaining resumes..."):
+                            baseline_settings = dict(settings, write_results=False, stream=False, stage="baseline_")
+                            baseline_run = run_batch_matching(others, job_text, max_workers, baseline_settings)
+                        baseline_scores = {file: score_result(result) for file, result in baseline_run["results"].items()}
+                        baseline_scores = {file: score for file, score in baseline_scores.items() if score is not None}
+                    else:
+                        baseline_scores = cached_scores(others, job_text, settings)
+                    baseline_scores.update(large_scores)
+                    show_cascade_report(small_scores, borderline, large_scores, baseline_scores)
+
+# Latency of every Ollama call made by this server process
+with st.sidebar.expander("📈 Ollama call latency"):
+    latency_rows = ollama_client.latency_summary()
+    if latency_rows:
+        st.dataframe(pd.DataFrame(latency_rows), use_container_width=True)
+    else:
+        st.caption("No Ollama calls yet.")
@@ -0,0 +1,170 @@
+import json
+import time
+import hashlib
+import sqlite3
+
+# SQLite file holding cached LLM match results (next to cvs.db)
+CACHE_DB = "match_cache.db"
+
+DEFAULT_MAX_AGE_DAYS = 30
+DEFAULT_MAX_SIZE_MB = 200
+
+
+def make_resume_hash(resume_json):
+    canonical_resume = json.dumps(resume_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical_resume.encode("utf-8")).hexdigest()
+
+
+def normalize_requirement(label):
+    return " ".join(label.lower().split())
+
+
+def make_cache_key(resume_json, job_text, model, prompt_version):
+    """Hash the canonical resume JSON, job text, model name and prompt version."""
+    canonical_resume = json.dumps(resume_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256()
+    for part in (canonical_resume, job_text, model, prompt_version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+# -------------------- Database Functions --------------------
+def create_cache():
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS match_cache (
+            key TEXT PRIMARY KEY,
+            result TEXT,
+            size INTEGER,
+            created_at REAL,
+            last_used REAL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_match_cache_last_used ON match_cache(last_used)")
+    # One row per (resume, requirement) pair so edited job requirements only need the new pairs
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS requirement_matches (
+            resume_hash TEXT,
+            requirement TEXT,
+            model TEXT,
+            prompt_version TEXT,
+            record TEXT,
+            created_at REAL,
+            PRIMARY KEY (resume_hash, requirement, model, prompt_version)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def get_cached_result(key, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """Return the cached result for a key, or None if missing or expired."""
+    now = time.time()
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("SELECT result, created_at FROM match_cache WHERE key = ?", (key,))
+    row = c.fetchone()
+    result = None
+    if row:
+        if now - row[1] > max_age_days * 86400:
+            c.execute("DELETE FROM match_cache WHERE key = ?", (key,))
+        else:
+            result = row[0]
+            c.execute("UPDATE match_cache SET last_used = ? WHERE key = ?", (now, key))
+    conn.commit()
+    conn.close()
+    return result
+
+
+def save_cached_result(key, result):
+    now = time.time()
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute(
+        "INSERT OR REPLACE INTO match_cache (key, result, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+        (key, result, len(result.encode("utf-8")), now, now)
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_requirement_matches(resume_hash, requirements, model, prompt_version, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """Return {normalized requirement: stored match record} for the requirements already evaluated."""
+    cutoff = time.time() - max_age_days * 86400
+    keys = [normalize_requirement(r) for r in requirements]
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    records = {}
+    for i in range(0, len(keys), 500):
+        batch = keys[i:i + 500]
+        c.execute(
+            f"""SELECT requirement, record FROM requirement_matches
+                WHERE resume_hash = ? AND model = ? AND prompt_version = ? AND created_at >= ?
+                AND requirement IN ({','.join('?' * len(batch))})""",
+            [resume_hash, model, prompt_version, cutoff] + batch
+        )
+        for requirement, record in c.fetchall():
+            records[requirement] = json.loads(record)
+    conn.close()
+    return records
+
+
+def save_requirement_matches(resume_hash, records, model, prompt_version):
+    """Store {requirement label: match record} for one resume."""
+    now = time.time()
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.executemany(
+        "INSERT OR REPLACE INTO requirement_matches (resume_hash, requirement, model, prompt_version, record, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (resume_hash, normalize_requirement(label), model, prompt_version, json.dumps(record, ensure_ascii=False), now)
+            for label, record in records.items()
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def evict_cache(max_age_days=DEFAULT_MAX_AGE_DAYS, max_size_mb=DEFAULT_MAX_SIZE_MB):
+    """Drop expired entries, then least recently used ones until the cache fits in max_size_mb."""
+    cutoff = time.time() - max_age_days * 86400
+    max_bytes = int(max_size_mb * 1024 * 1024)
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("DELETE FROM match_cache WHERE created_at < ?", (cutoff,))
+    evicted = c.rowcount
+    c.execute("DELETE FROM requirement_matches WHERE created_at < ?", (cutoff,))
+    evicted += c.rowcount
+    c.execute('''
+        DELETE FROM match_cache WHERE key IN (
+            SELECT key FROM (
+                SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running_size
+                FROM match_cache
+            ) WHERE running_size > ?
+        )
+    ''', (max_bytes,))
+    evicted += c.rowcount
+    conn.commit()
+    conn.close()
+    return evicted
+
+
+def clear_cache():
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("DELETE FROM match_cache")
+    c.execute("DELETE FROM requirement_matches")
+    conn.commit()
+    conn.close()
+
+
+def cache_stats():
+    """Return (number of entries, total size in bytes)."""
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM match_cache")
+    entries, size = c.fetchone()
+    conn.close()
+    return entries, size
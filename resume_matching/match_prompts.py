@@ -0,0 +1,90 @@
+import re
+import json
+from scoring import compute_score
+
+MATCH_INSTRUCTIONS = """You are an AI assistant designed to evaluate how well a candidate fits a specific job role based on their resume and a structured job description. The job description includes multiple requirement categories, each with an importance weight. Your task is to extract claims about how well the candidate meets each requirement and present them in a structured JSON format.
+
+## Instructions:
+
+1. Analyze the **Resume Data** and the **Job Description Data** provided below.
+2. For each requirement (skill, education, experience, soft skill, etc.) in the job description, evaluate the degree to which the candidate meets the requirement based on the resume.
+3. For each requirement, extract and return the following fields:
+   - **requirement**: the original job requirement or skill.
+   - **match**: choose one of the following: "FULL", "PARTIAL","NEAR FULL" or "NONE".
+   - **evidence**: a short explanation or quote from the resume that supports your evaluation.
+   - **source**: "RESUME" if the evidence is explicitly present in the resume or "Inference"
+   - **importance**: put the corresponding weight from the job description file
+PLEASE MAKE SURE TO PUT ONLY THINGS THAT OCCUR IN THE RESUME DATA and Be very critical in your assessment.
+4. Output the result in this JSON format:
+[
+  {
+    "requirement": "",
+    "match": "",
+    "evidence": "",
+    "source": "",
+    "importance": 0.0
+  },
+  ...
+]
+PLEASE MAKE SURE TO GIVE THE EXACT JSON FORMAT IN THE OUTPUT .
+MAKE SURE to evaluate the candidate's fit for ALL requirements, including soft skills and penalties.
+Mention the penalties that should be applied according to the job description penalties and the match with the resume"""
+
+# Added when the job description entries carry ids, so results can be matched back even when reworded
+REQUIREMENT_ID_INSTRUCTIONS = """
+Each requirement in the job description has an "id". Copy it unchanged into an "id" field of the result
+for that requirement, even if you rephrase the requirement. Do not give an "id" to penalties."""
+
+# Function to build the part of the prompt shared by every resume of a batch
+def build_shared_prefix(job_text, with_ids=False):
+    instructions = MATCH_INSTRUCTIONS + (REQUIREMENT_ID_INSTRUCTIONS if with_ids else "")
+    return f"""
+
+{instructions}
+## Job Description Data:
+{job_text}
+
+"""
+
+# Function to build the matching prompt for the selected layout
+def build_match_prompt(resume_text, job_text, layout="resume_first", with_ids=False):
+    if layout == "prefix_first":
+        # Shared content first so Ollama can reuse the cached prefix between candidates
+        return build_shared_prefix(job_text, with_ids) + f"""## Resume Data:
+{resume_text}
+
+"""
+    instructions = MATCH_INSTRUCTIONS + (REQUIREMENT_ID_INSTRUCTIONS if with_ids else "")
+    return f"""
+
+{instructions}
+## Resume Data:
+{resume_text}
+
+## Job Description Data:
+{job_text}
+
+"""
+
+# Function to turn Ollama's timing fields (nanoseconds) into latency metrics
+def extract_timings(data, wall_time):
+    ns = 1e9
+    load = data.get("load_duration", 0) / ns
+    prompt_eval = data.get("prompt_eval_duration", 0) / ns
+    return {
+        "ttft_s": load + prompt_eval,
+        "total_s": data.get("total_duration", 0) / ns or wall_time,
+        "load_s": load,
+        "prompt_eval_s": prompt_eval,
+        "eval_s": data.get("eval_duration", 0) / ns,
+        "prompt_tokens": data.get("prompt_eval_count", 0),
+        "output_tokens": data.get("eval_count", 0),
+    }
+
+# Function to score a raw match output like score.py does (None when it is not valid JSON)
+def score_result(result):
+    json_match = re.search(r"\[.*\]", result, re.DOTALL)
+    try:
+        return compute_score(json.loads(json_match.group(0)))
+    except (AttributeError, json.JSONDecodeError, TypeError):
+        return None
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import numpy as np
+from scoring import match_mapping
+
+# Columnar copy of matching_results/ (next to the folder)
+STORE_FILE = "match_store.npz"
+STORE_VERSION = 1
+
+# Match level codes stored in the matrix. ABSENT marks a requirement the candidate's file does not contain.
+LEVELS = ["ABSENT", "MISSING", "NONE", "PARTIAL", "NEAR FULL", "FULL"]
+LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+
+
+def level_values(mapping=match_mapping):
+    """Vector of match values indexed by level code."""
+    return np.array([0.0] + [mapping.get(level, 0.0) for level in LEVELS[1:]], dtype=np.float32)
+
+
+def parse_match_file(path):
+    """Return {column: (level code, importance)} for a match file, or None if it is not a valid match list.
+
+    A requirement repeated in the same file gets one column per occurrence ("label", "label#2", ...)
+    so scores stay identical to summing over the raw list.
+    """
+    with open(path, "r") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(data, list):
+        return None
+
+    cells = {}
+    for item in data:
+        if not isinstance(item, dict):
+            return None
+        label = " ".join(str(item.get("requirement", "")).split())
+        column = label
+        occurrence = 1
+        while column in cells:
+            occurrence += 1
+            column = f"{label}#{occurrence}"
+        importance = item.get("importance", 0.0)
+        try:
+            importance = float(importance or 0.0)
+        except (TypeError, ValueError):
+            importance = 0.0
+        # Unknown match strings (and "None") score like MISSING, as in score.py
+        code = LEVEL_CODES.get(str(item.get("match", "MISSING")), 0) or LEVEL_CODES["MISSING"]
+        cells[column] = (code, importance)
+    return cells
+
+
+class MatchStore:
+    """Candidate x requirement matrices of match level codes (int8) and importances (float32)."""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.files = np.array([], dtype=str)
+        self.mtimes = np.array([], dtype=np.float64)
+        self.valid = np.array([], dtype=bool)
+        self.requirements = np.array([], dtype=str)
+        self.levels = np.zeros((0, 0), dtype=np.int8)
+        self.importance = np.zeros((0, 0), dtype=np.float32)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if int(data["version"]) == STORE_VERSION:
+                    self.files = data["files"]
+                    self.mtimes = data["mtimes"]
+                    self.valid = data["valid"]
+                    self.requirements = data["requirements"]
+                    self.levels = data["levels"]
+                    self.importance = data["importance"]
+
+    @property
+    def names(self):
+        return np.array([f.replace("_match.json", "") for f in self.files], dtype=str)
+
+    def save(self):
+        # Write through a file object so numpy keeps the exact file name
+        with open(self.path, "wb") as f:
+            np.savez(
+                f,
+                version=STORE_VERSION,
+                files=self.files,
+                mtimes=self.mtimes,
+                valid=self.valid,
+                requirements=self.requirements,
+                levels=self.levels,
+                importance=self.importance
+            )
+
+    def update(self, directory="matching_results"):
+        """Ingest new or modified match files and drop deleted ones. Returns (ingested, removed)."""
+        current = {
+            entry.name: entry.stat().st_mtime
+            for entry in os.scandir(directory)
+            if entry.name.endswith("_match.json")
+        }
+        known = dict(zip(self.files.tolist(), self.mtimes.tolist()))
+        keep = np.array([current.get(f) == m for f, m in known.items()], dtype=bool)
+        changed = [f for f, m in current.items() if known.get(f) != m]
+        removed = sum(1 for f in known if f not in current)
+        if not changed and keep.all():
+            return 0, 0
+
+        parsed = [(f, current[f], parse_match_file(os.path.join(directory, f))) for f in changed]
+
+        # Extend the requirement vocabulary with columns seen for the first time
+        columns = {r: i for i, r in enumerate(self.requirements.tolist())}
+        for _, _, cells in parsed:
+            for column in cells or {}:
+                columns.setdefault(column, len(columns))
+
+        n_cols = len(columns)
+        levels = np.zeros((len(parsed), n_cols), dtype=np.int8)
+        importance = np.zeros((len(parsed), n_cols), dtype=np.float32)
+        for row, (_, _, cells) in enumerate(parsed):
+            for column, (code, weight) in (cells or {}).items():
+                levels[row, columns[column]] = code
+                importance[row, columns[column]] = weight
+
+        pad = n_cols - self.levels.shape[1]
+        old_levels = np.pad(self.levels[keep], ((0, 0), (0, pad)))
+        old_importance = np.pad(self.importance[keep], ((0, 0), (0, pad)))
+
+        self.files = np.concatenate([self.files[keep], np.array([p[0] for p in parsed], dtype=str)])
+        self.mtimes = np.concatenate([self.mtimes[keep], np.array([p[1] for p in parsed], dtype=np.float64)])
+        self.valid = np.concatenate([self.valid[keep], np.array([p[2] is not None for p in parsed], dtype=bool)])
+        self.requirements = np.array(list(columns), dtype=str)
+        self.levels = np.vstack([old_levels, levels])
+        self.importance = np.vstack([old_importance, importance])
+        self.save()
+        return len(parsed), removed
+
+    def scores(self, values=None):
+        """Weighted match score (0-100) of every candidate in one vectorized pass."""
+        values = level_values() if values is None else values
+        numerator = (values[self.levels] * self.importance).sum(axis=1, dtype=np.float64)
+        denominator = self.importance.sum(axis=1, dtype=np.float64)
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1) * 100, 0.0)
+
+    def requirement_groups(self):
+        """Base label of every column ("label#2" -> "label") and the sorted list of distinct labels."""
+        labels = [r.rsplit("#", 1)[0] if re.search(r"#\d+$", r) else r for r in self.requirements.tolist()]
+        groups = sorted(set(labels))
+        positions = {label: i for i, label in enumerate(groups)}
+        return np.array([positions[label] for label in labels], dtype=np.int64), groups
+
+    def base_weights(self, group_of_column, n_groups):
+        """Mean importance of each requirement label over the candidates that were evaluated on it."""
+        present = (self.levels > 0).sum(axis=0)
+        total = self.importance.sum(axis=0, dtype=np.float64)
+        group_total = np.bincount(group_of_column, weights=total, minlength=n_groups)
+        group_present = np.bincount(group_of_column, weights=present, minlength=n_groups)
+        return np.where(group_present > 0, group_total / np.maximum(group_present, 1), 0.0)
+
+    def rescore(self, values, column_weights):
+        """Scores with new match level values and a weight multiplier per requirement column.
+
+        Both sums are matrix-vector products over the candidate x requirement matrix.
+        """
+        weighted = values.astype(np.float32)[self.levels] * self.importance
+        column_weights = column_weights.astype(np.float32)
+        numerator = (weighted @ column_weights).astype(np.float64)
+        denominator = (self.importance @ column_weights).astype(np.float64)
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1) * 100, 0.0)
+
+
+def update_store(directory="matching_results", path=STORE_FILE):
+    """Load the store, bring it up to date with the directory and return it."""
+    store = MatchStore(path)
+    store.update(directory)
+    return store
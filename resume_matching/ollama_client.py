@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_PORT = 11434
+
+
+def ollama_url(host):
+    """Base URL for an OLLAMA_HOST value.
+
+    Ollama itself takes a bare host[:port] ("0.0.0.0", "127.0.0.1:11434"); like Ollama,
+    a missing scheme means http and a missing port means 11434. Full URLs are kept as they are.
+    """
+    host = (host or "").strip().rstrip("/")
+    if not host:
+        return f"http://localhost:{DEFAULT_PORT}"
+    if "://" in host:
+        return host
+    if host.startswith(":"):
+        host = "127.0.0.1" + host
+    # The port follows the last colon, outside the brackets of an IPv6 address
+    if ":" not in host.rsplit("]", 1)[-1]:
+        host = f"{host}:{DEFAULT_PORT}"
+    return f"http://{host}"
+
+
+OLLAMA_URL = ollama_url(os.environ.get("OLLAMA_HOST"))
+
+# Seconds to open a connection / to wait for the next bytes of a response
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 600
+
+POOL_SIZE = 16
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+_session = None
+_session_lock = threading.Lock()
+
+# Last calls as (endpoint, model, seconds, status code or exception name)
+call_log = deque(maxlen=5000)
+
+
+def get_session():
+    """Shared keep-alive session with a connection pool and retries on transient errors.
+
+    Only failed connections and 502/503/504 answers (the request was not processed) are retried.
+    A read timeout is not: /api/generate is not idempotent, and re-sending a hung generation
+    would wait READ_TIMEOUT again for each retry.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                connect=MAX_RETRIES,
+                read=False,
+                other=0,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=["GET", "POST"]
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def post(endpoint, payload, stream=False, timeout=None):
+    """POST to an Ollama endpoint (e.g. "/api/generate") and record the call latency.
+
+    For streamed calls the latency is the time to the response headers.
+    """
+    start = time.time()
+    status = None
+    try:
+        response = get_session().post(
+            f"{OLLAMA_URL}{endpoint}",
+            json=payload,
+            stream=stream,
+            timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        status = response.status_code
+        return response
+    except Exception as e:
+        status = type(e).__name__
+        raise
+    finally:
+        call_log.append((endpoint, payload.get("model", ""), time.time() - start, status))
+
+
+def warm_up(model, keep_alive="30m"):
+    """Load a model into memory without generating anything. Returns the load time in seconds."""
+    start = time.time()
+    response = get_session().post(
+        f"{OLLAMA_URL}/api/generate",
+        json={"model": model, "keep_alive": keep_alive},
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+    )
+    response.raise_for_status()
+    seconds = time.time() - start
+    call_log.append(("/api/generate (warm-up)", model, seconds, response.status_code))
+    return seconds
+
+
+def latency_summary():
+    """Return one row per (endpoint, model) with call count and latency percentiles."""
+    groups = {}
+    for endpoint, model, seconds, status in list(call_log):
+        groups.setdefault((endpoint, model), []).append((seconds, status))
+
+    rows = []
+    for (endpoint, model), calls in groups.items():
+        durations = sorted(seconds for seconds, _ in calls)
+
+        def percentile(p):
+            return durations[min(len(durations) - 1, int(p * len(durations)))]
+
+        rows.append({
+            "Endpoint": endpoint,
+            "Model": model,
+            "Calls": len(calls),
+            "Errors": sum(1 for _, status in calls if status != 200),
+            "Mean (s)": round(sum(durations) / len(durations), 3),
+            "p50 (s)": round(percentile(0.5), 3),
+            "p95 (s)": round(percentile(0.95), 3)
+        })
+    return rows
@@ -0,0 +1,197 @@
+import re
+import json
+import time
+import sqlite3
+import unicodedata
+
+# SQLite file holding generated and edited job requirements (next to cvs.db)
+CACHE_DB = "requirements_cache.db"
+
+DEFAULT_MAX_ENTRIES = 200
+
+# Abbreviations expanded before comparing titles ("ML Engineer" -> "machine learning engineer")
+ABBREVIATIONS = {
+    "ml": "machine learning",
+    "mle": "machine learning engineer",
+    "ai": "artificial intelligence",
+    "ia": "artificial intelligence",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "llm": "large language model",
+    "ds": "data scientist",
+    "bi": "business intelligence",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "sre": "site reliability engineer",
+    "qa": "quality assurance",
+    "ui": "user interface",
+    "ux": "user experience",
+    "pm": "product manager",
+    "hr": "human resources",
+    "it": "information technology",
+    "eng": "engineer",
+    "engr": "engineer",
+    "dev": "developer",
+    "devs": "developer",
+    "mgr": "manager",
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "frontend": "front end",
+    "backend": "back end",
+    "fullstack": "full stack",
+}
+
+# Level numerals compared as digits ("Engineer II" = "Engineer 2", never "Engineer III")
+ROMAN_LEVELS = {"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6"}
+
+
+def normalize_title(title):
+    """Lowercase, strip accents and punctuation, expand abbreviations, sort the words."""
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii").lower()
+    words = []
+    for word in re.findall(r"[a-z0-9+#]+", title):
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    return " ".join(sorted(words))
+
+
+def title_words(key):
+    """Word set of a normalized title, with level numerals as digits and plurals singular."""
+    words = set()
+    for word in key.split():
+        word = ROMAN_LEVELS.get(word, word)
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def same_role(a, b):
+    """True when two normalized titles differ only by plurals, abbreviations or word order.
+
+    Every word counts, so titles whose seniority or level differs ("senior" / "junior",
+    "ii" / "iii") never match.
+    """
+    return title_words(a) == title_words(b)
+
+
+# -------------------- Database Functions --------------------
+def create_cache():
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS job_requirements (
+            title_key TEXT,
+            model TEXT,
+            title TEXT,
+            requirements TEXT,
+            edited INTEGER DEFAULT 0,
+            hits INTEGER DEFAULT 0,
+            created_at REAL,
+            last_used REAL,
+            PRIMARY KEY (title_key, model)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_job_requirements_last_used ON job_requirements(last_used)")
+    conn.commit()
+    conn.close()
+
+
+def get_requirements(title, model):
+    """Return (requirements, cached title) for the same role, or (None, None).
+
+    The normalized title is looked up first; otherwise a cached title for the same model
+    that names the same role (see same_role) is used, the most recently used one first.
+    """
+    key = normalize_title(title)
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("SELECT title_key, title, requirements FROM job_requirements WHERE title_key = ? AND model = ?", (key, model))
+    row = c.fetchone()
+    if row is None and key:
+        c.execute(
+            "SELECT title_key, title, requirements FROM job_requirements WHERE model = ? ORDER BY last_used DESC",
+            (model,)
+        )
+        row = next((candidate for candidate in c.fetchall() if same_role(key, candidate[0])), None)
+    if row is None:
+        conn.close()
+        return None, None
+    c.execute(
+        "UPDATE job_requirements SET hits = hits + 1, last_used = ? WHERE title_key = ? AND model = ?",
+        (time.time(), row[0], model)
+    )
+    conn.commit()
+    conn.close()
+    return json.loads(row[2]), row[1]
+
+
+def save_requirements(title, model, requirements, edited=False, max_entries=DEFAULT_MAX_ENTRIES):
+    """Store generated (or, with edited=True, hand-edited) requirements under the normalized title."""
+    now = time.time()
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO job_requirements (title_key, model, title, requirements, edited, hits, created_at, last_used)
+        VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+        ON CONFLICT (title_key, model) DO UPDATE SET
+            title = excluded.title,
+            requirements = excluded.requirements,
+            edited = excluded.edited,
+            created_at = excluded.created_at,
+            last_used = excluded.last_used
+    ''', (normalize_title(title), model, title, json.dumps(requirements, ensure_ascii=False), int(edited), now, now))
+    conn.commit()
+    conn.close()
+    evict_cache(max_entries)
+
+
+def evict_cache(max_entries=DEFAULT_MAX_ENTRIES):
+    """Drop the least recently used entries beyond max_entries. Returns the number removed."""
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute('''
+        DELETE FROM job_requirements WHERE rowid IN (
+            SELECT rowid FROM job_requirements ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        )
+    ''', (max_entries,))
+    evicted = c.rowcount
+    conn.commit()
+    conn.close()
+    return evicted
+
+
+def invalidate(title, model=None):
+    """Forget the cached requirements for a title (for one model or all of them)."""
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    if model is None:
+        c.execute("DELETE FROM job_requirements WHERE title_key = ?", (normalize_title(title),))
+    else:
+        c.execute("DELETE FROM job_requirements WHERE title_key = ? AND model = ?", (normalize_title(title), model))
+    removed = c.rowcount
+    conn.commit()
+    conn.close()
+    return removed
+
+
+def clear_cache():
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("DELETE FROM job_requirements")
+    conn.commit()
+    conn.close()
+
+
+def list_cached():
+    """Return cached entries as dicts, most recently used first."""
+    conn = sqlite3.connect(CACHE_DB)
+    c = conn.cursor()
+    c.execute("SELECT title, model, edited, hits, last_used FROM job_requirements ORDER BY last_used DESC")
+    rows = [
+        {"title": title, "model": model, "edited": bool(edited), "hits": hits, "last_used": last_used}
+        for title, model, edited, hits, last_used in c.fetchall()
+    ]
+    conn.close()
+    return rows
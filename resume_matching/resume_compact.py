@@ -0,0 +1,76 @@
+import json
+
+# Resume fields that never help the job match (contact details, personal life)
+DEFAULT_DROP_FIELDS = ("phone", "email", "links", "hobbies", "interests", "references", "volunteer_experience")
+
+# Rough size of a token for Llama-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def drop_empty(value):
+    """Recursively remove None, empty strings, empty lists and empty dicts."""
+    if isinstance(value, dict):
+        cleaned = {k: drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        cleaned = [drop_empty(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def truncate_strings(value, max_chars):
+    """Cut every string longer than max_chars, keeping its beginning."""
+    if isinstance(value, dict):
+        return {k: truncate_strings(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [truncate_strings(v, max_chars) for v in value]
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars].rstrip() + "…"
+    return value
+
+
+def dense_dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_resume(resume_json, token_budget=0, drop_fields=DEFAULT_DROP_FIELDS):
+    """Serialize a resume for the match prompt with as few tokens as possible.
+
+    Empty and irrelevant fields are dropped and the JSON is written without whitespace.
+    With a token_budget, the longest strings (descriptions, projects, summary) are cut to
+    the largest common length that fits the budget.
+
+    Returns (text, stats) where stats compares against json.dumps(indent=2).
+    """
+    original_text = json.dumps(resume_json, indent=2, ensure_ascii=False)
+    compact = drop_empty({k: v for k, v in resume_json.items() if k not in drop_fields})
+    text = dense_dumps(compact)
+
+    if token_budget and estimate_tokens(text) > token_budget:
+        # Binary search the longest per-string length that keeps the resume within budget
+        low, high = 20, max(len(text), 20)
+        best = dense_dumps(truncate_strings(compact, low))
+        while low <= high:
+            middle = (low + high) // 2
+            candidate = dense_dumps(truncate_strings(compact, middle))
+            if estimate_tokens(candidate) <= token_budget:
+                best = candidate
+                low = middle + 1
+            else:
+                high = middle - 1
+        text = best
+
+    original_tokens = estimate_tokens(original_text)
+    compact_tokens = estimate_tokens(text)
+    stats = {
+        "original_tokens": original_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_tokens": original_tokens - compact_tokens
+    }
+    return text, stats
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import math
+from collections import defaultdict
+from job_spec import parse_requirements
+
+# On-disk index of parsed resumes (next to parsed_json/)
+INDEX_FILE = "resume_index.json"
+
+# Resume fields used for lexical matching and their weight in term frequencies
+FIELD_WEIGHTS = {
+    "technical_skills": 3.0,
+    "experience": 1.0,
+    "projects": 1.5
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "the", "to", "with", "using", "use", "etc", "e.g", "including", "such",
+    "experience", "skills", "knowledge", "years", "year", "strong", "ability"
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Lowercase word tokens, keeping tech names such as c++, c# or node.js intact."""
+    tokens = re.findall(r"[a-z0-9][a-z0-9+#.]*", text.lower())
+    return [t.rstrip(".") for t in tokens if t.rstrip(".") and t.rstrip(".") not in STOPWORDS]
+
+
+def resume_field_texts(resume_json):
+    """Return {field: text} for the fields listed in FIELD_WEIGHTS."""
+    skills = resume_json.get("technical_skills") or {}
+    skill_text = " ".join(" ".join(values or []) for values in skills.values()) if isinstance(skills, dict) else ""
+    experience_text = " ".join(
+        f"{exp.get('title') or ''} {exp.get('description') or ''}"
+        for exp in resume_json.get("experience") or [] if isinstance(exp, dict)
+    )
+    project_text = " ".join(p for p in resume_json.get("projects") or [] if isinstance(p, str))
+    return {"technical_skills": skill_text, "experience": experience_text, "projects": project_text}
+
+
+def requirements_to_query(job_text):
+    """Build {term: weight} from a job_requirements.py JSON export (or plain text as a fallback)."""
+    query = defaultdict(float)
+    _, items = parse_requirements(job_text)
+    if not items:
+        for term in tokenize(job_text):
+            query[term] += 1.0
+        return dict(query)
+
+    for item in items:
+        for term in set(tokenize(item["label"])):
+            query[term] += item["weight"]
+    return dict(query)
+
+
+class ResumeIndex:
+    """BM25 inverted index over technical_skills, experience and projects of parsed resumes."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        # file -> {"mtime": float, "length": float, "tf": {term: weighted frequency}}
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.docs = json.load(f).get("docs", {})
+            for file, doc in self.docs.items():
+                for term, tf in doc["tf"].items():
+                    self.postings[term][file] = tf
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"docs": self.docs}, f, ensure_ascii=False)
+
+    def add_resume(self, file, resume_json, mtime=0.0):
+        self.remove_resume(file)
+        tf = defaultdict(float)
+        for field, text in resume_field_texts(resume_json).items():
+            for term in tokenize(text):
+                tf[term] += FIELD_WEIGHTS[field]
+        self.docs[file] = {"mtime": mtime, "length": sum(tf.values()), "tf": dict(tf)}
+        for term, freq in tf.items():
+            self.postings[term][file] = freq
+
+    def remove_resume(self, file):
+        doc = self.docs.pop(file, None)
+        if doc:
+            for term in doc["tf"]:
+                self.postings[term].pop(file, None)
+                if not self.postings[term]:
+                    del self.postings[term]
+
+    def update(self, directory="parsed_json"):
+        """Re-index new or modified resumes and drop deleted ones. Returns (added/updated, removed)."""
+        files = {f: os.path.getmtime(os.path.join(directory, f)) for f in os.listdir(directory) if f.endswith(".json")}
+        changed = 0
+        for file, mtime in files.items():
+            if file in self.docs and self.docs[file]["mtime"] == mtime:
+                continue
+            with open(os.path.join(directory, file), "r", encoding="utf-8") as f:
+                try:
+                    resume_json = json.load(f)
+                except json.JSONDecodeError:
+                    continue
+            self.add_resume(file, resume_json, mtime)
+            changed += 1
+        removed = [file for file in self.docs if file not in files]
+        for file in removed:
+            self.remove_resume(file)
+        if changed or removed:
+            self.save()
+        return changed, len(removed)
+
+    def search(self, query, top_k=None, min_relative_score=0.0):
+        """Rank resumes for a {term: weight} query with BM25.
+
+        Returns [(file, score)] sorted by score, keeping the top_k best and those scoring at
+        least min_relative_score times the best score.
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        avg_length = sum(doc["length"] for doc in self.docs.values()) / n_docs or 1.0
+        scores = defaultdict(float)
+        for term, query_weight in query.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for file, tf in postings.items():
+                norm = K1 * (1 - B + B * self.docs[file]["length"] / avg_length)
+                scores[file] += query_weight * idf * tf * (K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if ranked and min_relative_score > 0:
+            threshold = ranked[0][1] * min_relative_score
+            ranked = [(file, score) for file, score in ranked if score >= threshold]
+        if top_k:
+            ranked = ranked[:top_k]
+        return ranked
+
+
+def update_index(directory="parsed_json", path=INDEX_FILE):
+    """Load the index, bring it up to date with the directory and return it."""
+    index = ResumeIndex(path)
+    index.update(directory)
+    return index
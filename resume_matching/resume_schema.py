@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# -------------------- Data Schema --------------------
+class TechnicalSkills(BaseModel):
+    programming_languages: List[str]
+    frameworks: List[str]
+    skills: List[str]
+
+class Experience(BaseModel):
+    company: str
+    title: str
+    description: Optional[str]
+    start_date: Optional[str]
+    end_date: Optional[str]
+
+class Education(BaseModel):
+    institution: str
+    degree: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+
+class Resume(BaseModel):
+    name: str
+    phone: str
+    email: str
+    links: List[str]
+    experience: List[Experience]
+    education: List[Education]
+    technical_skills: TechnicalSkills
+    key_accomplishments: str
+    certifications: List[str]
+    projects: List[str]
+    languages: List[str]
+    interests: List[str]
+    hobbies: List[str]
+    awards: List[str]
+    volunteer_experience: List[str]
+    references: List[str]
+    summary: str
+    location: str
@@ -1,8 +1,12 @@
-import os
-import json
+import time
+import threading
+import numpy as np
 import pandas as pd
 import streamlit as st
 from io import StringIO
+from match_store import MatchStore, LEVEL_CODES, level_values
+from scoring import match_mapping
+from job_spec import parse_requirements
 
 st.set_page_config(page_title="Candidate Matching Scores", layout="wide")
 st.title("📊 Candidate Matching Scores Generator")
@@ -10,49 +14,33 @@ st.title("📊 Candidate Matching Scores Generator")
 # Folder containing JSON files
 directory = "matching_results"
 
-# Match value mapping
-match_mapping = {
-    "FULL": 1.0,
-    "NEAR FULL": 0.7,
-    "PARTIAL": 0.4,
-    "NONE": 0.0,
-    "MISSING": 0.0,
-    "None": 0.0
-}
-
-# Collect results
-results = []
-
-for filename in os.listdir(directory):
-    if filename.endswith("_match.json"):
-        filepath = os.path.join(directory, filename)
-        candidate_name = filename.replace("_match.json", "")
-        
-        with open(filepath, "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                st.warning(f"⚠️ Invalid JSON in file: {filename}")
-                continue
-
-        numerator = 0.0
-        denominator = 0.0
-
-        for item in data:
-            match_str = item.get("match", "MISSING")
-            importance = item.get("importance", 0.0)
-            if importance is None:  # <-- Correction ici
-                importance = 0.0
-            match_val = match_mapping.get(match_str, 0.0)
-
-            numerator += match_val * importance
-            denominator += importance
-
-        score = (numerator / denominator) * 100 if denominator > 0 else 0
-        results.append({"Name": candidate_name, "Score": round(score, 2)})
+# Keep the match matrices in memory across reruns (one store shared by every session)
+@st.cache_resource(show_spinner=False)
+def get_store():
+    return MatchStore(), threading.Lock()
+
+# Bring the columnar store up to date on every rerun (only new or modified files are parsed;
+# match.py rewrites *_match.json in place, so the per-file mtimes are checked, not the folder's)
+start_time = time.time()
+store, store_lock = get_store()
+with store_lock:
+    ingested, removed = store.update(directory)
+    invalid_files = store.files[~store.valid]
+    # One vectorized weighted sum over the candidate x requirement matrix
+    scores = store.scores()
+    names = store.names[store.valid]
+    valid = store.valid
+
+for filename in invalid_files:
+    st.warning(f"⚠️ Invalid JSON in file: {filename}")
+duration = time.time() - start_time
 
 # Create DataFrame
-df = pd.DataFrame(results)
+df = pd.DataFrame({"Name": names, "Score": np.round(scores[valid], 2)})
+st.caption(
+    f"⚡ {len(df)} candidates scored in {duration * 1000:.0f} ms "
+    f"({ingested} match files ingested, {removed} removed)"
+)
 
 # Display the table
 st.subheader("📋 Calculated Scores")
@@ -72,3 +60,77 @@ st.download_button(
 )
 
 st.success("✅ Matching scores generated successfully.")
+
+# -------------------- What-if Rescoring --------------------
+st.header("🎛️ What-if Rescoring")
+st.caption("Adjust match level values and requirement weights; every candidate is re-ranked from the in-memory matrix.")
+
+# The lock keeps another session's update from changing the matrices mid-rescore
+with store_lock:
+    if store.valid.any() and len(store.requirements):
+        # Match level values
+        values = level_values()
+        level_columns = st.columns(4)
+        for column, level in zip(level_columns, ["FULL", "NEAR FULL", "PARTIAL", "NONE"]):
+            with column:
+                values[LEVEL_CODES[level]] = st.slider(level, 0.0, 1.0, float(match_mapping[level]), 0.05, key=f"value_{level}")
+
+        # Categories come from the job requirements export, when provided
+        group_of_column, groups = store.requirement_groups()
+        requirements_file = st.file_uploader("📄 Job requirements JSON (optional, for category weights)", type=["json", "txt"])
+        category_of = {}
+        if requirements_file is not None:
+            _, items = parse_requirements(requirements_file.getvalue().decode("utf-8", errors="ignore"))
+            category_of = {" ".join(item["label"].split()): item["category"] for item in items}
+        group_categories = [category_of.get(label, "Other") for label in groups]
+
+        # Per-category multipliers
+        categories = sorted(set(group_categories))
+        category_weights = {}
+        with st.expander("📌 Category weights", expanded=bool(category_of)):
+            for category in categories:
+                category_weights[category] = st.slider(f"{category}", 0.0, 2.0, 1.0, 0.05, key=f"category_{category}")
+
+        # Per-requirement weights, edited in one grid
+        base = np.round(store.base_weights(group_of_column, len(groups)), 3)
+        with st.expander("⚖️ Requirement weights"):
+            weights_table = pd.DataFrame({
+                "Requirement": groups,
+                "Category": group_categories,
+                "Weight": base
+            })
+            edited = st.data_editor(
+                weights_table,
+                disabled=["Requirement", "Category"],
+                hide_index=True,
+                use_container_width=True,
+                key="requirement_weights"
+            )
+
+        # Multiplier of each column = new weight / mean original importance x category weight
+        start_time = time.time()
+        new_weights = edited["Weight"].to_numpy(dtype=np.float64)
+        group_multipliers = np.where(base > 0, new_weights / np.where(base > 0, base, 1), 0.0)
+        group_multipliers *= np.array([category_weights[c] for c in group_categories])
+        what_if_scores = store.rescore(values, group_multipliers[group_of_column])[store.valid]
+
+        # Top-N by partial selection instead of sorting everyone
+        names = store.names[store.valid]
+        num_top = st.number_input("Number of top candidates", min_value=1, max_value=len(names), value=min(20, len(names)))
+        top = np.argpartition(-what_if_scores, num_top - 1)[:num_top]
+        top = top[np.argsort(-what_if_scores[top])]
+        duration = time.time() - start_time
+
+        original_scores = store.scores()[store.valid]
+        baseline_rank = pd.Series(original_scores, index=names).rank(ascending=False, method="min")
+        top_df = pd.DataFrame({
+            "Name": names[top],
+            "What-if Score": np.round(what_if_scores[top], 2),
+            "Original Score": np.round(original_scores[top], 2),
+            "Original Rank": baseline_rank.to_numpy()[top].astype(int)
+        })
+        top_df.index = np.arange(1, len(top_df) + 1)
+        st.caption(f"⚡ {len(names)} candidates rescored and ranked in {duration * 1000:.0f} ms")
+        st.dataframe(top_df, use_container_width=True)
+    else:
+        st.info("ℹ️ No valid match files to rescore yet.")
@@ -0,0 +1,27 @@
+# Match value mapping
+match_mapping = {
+    "FULL": 1.0,
+    "NEAR FULL": 0.7,
+    "PARTIAL": 0.4,
+    "NONE": 0.0,
+    "MISSING": 0.0,
+    "None": 0.0
+}
+
+
+def compute_score(data):
+    """Weighted match score (0-100) of a list of requirement match objects."""
+    numerator = 0.0
+    denominator = 0.0
+
+    for item in data:
+        match_str = item.get("match", "MISSING")
+        importance = item.get("importance", 0.0)
+        if importance is None:  # <-- Correction ici
+            importance = 0.0
+        match_val = match_mapping.get(match_str, 0.0)
+
+        numerator += match_val * importance
+        denominator += importance
+
+    return (numerator / denominator) * 100 if denominator > 0 else 0
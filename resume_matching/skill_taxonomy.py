@@ -0,0 +1,213 @@
+import re
+import json
+from job_spec import parse_requirements, requirements_to_job_text
+from match_prompts import build_match_prompt
+from resume_compact import estimate_tokens
+
+# Canonical skill -> other spellings and abbreviations of the same skill (matched after normalize_label).
+# Related but distinct skills ("neural networks", "github", "scrum") and ambiguous short forms
+# ("cv", "js", "r", "node") are deliberately left out: an alias merges two requirements into one.
+TAXONOMY = {
+    # Languages
+    "Python": ["python3", "python programming"],
+    "R": ["r programming", "r language"],
+    "SQL": ["structured query language"],
+    "Java": ["java programming"],
+    "JavaScript": ["javascript es6", "ecmascript"],
+    "TypeScript": [],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang"],
+    "Scala": [],
+    "Bash": ["bash scripting"],
+    # Machine learning and data
+    "Machine Learning": ["ml", "machine learning algorithms", "machine learning models", "ml algorithms", "ml models"],
+    "Deep Learning": ["dl"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": [],
+    "Large Language Models": ["llm", "llms", "large language model"],
+    "Reinforcement Learning": [],
+    "Statistics": [],
+    "Data Analysis": ["data analytics", "analysis of data"],
+    "Data Visualization": ["data visualisation", "dataviz"],
+    "Data Preprocessing": ["data pre processing"],
+    "MLOps": ["ml ops", "machine learning operations"],
+    "TensorFlow": ["tensorflow 2", "tf2"],
+    "PyTorch": [],
+    "Keras": [],
+    "scikit-learn": ["sklearn", "scikit learn", "scikitlearn"],
+    "Hugging Face Transformers": [],
+    "LangChain": [],
+    "pandas": [],
+    "NumPy": [],
+    "Matplotlib": [],
+    "Apache Spark": ["spark"],
+    "Hadoop": ["apache hadoop"],
+    "Airflow": ["apache airflow"],
+    "Kafka": ["apache kafka"],
+    "Tableau": [],
+    "Power BI": ["powerbi", "microsoft power bi"],
+    "Excel": ["microsoft excel", "ms excel"],
+    # Platforms and tools
+    "Amazon Web Services": ["aws", "amazon aws"],
+    "Microsoft Azure": ["azure"],
+    "Google Cloud Platform": ["gcp", "google cloud"],
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "Git": [],
+    "CI/CD": ["continuous integration and deployment", "continuous integration and continuous deployment"],
+    "Linux": [],
+    "REST APIs": ["rest api", "restful apis", "restful api"],
+    "PostgreSQL": ["postgres"],
+    "MySQL": [],
+    "MongoDB": ["mongo"],
+    "NoSQL": ["nosql databases"],
+    "FastAPI": [],
+    "Flask": [],
+    "Django": [],
+    "React": ["reactjs", "react js"],
+    "Node.js": ["nodejs"],
+    "Agile": ["agile methodologies", "agile methodology"],
+    # Soft skills
+    "Communication": ["communication skills", "verbal and written communication", "written and verbal communication"],
+    "Teamwork": ["team work"],
+    "Problem Solving": ["problem solving skills"],
+    "Leadership": ["leadership skills"],
+    "Time Management": ["time management skills"],
+    "Adaptability": [],
+    "Attention to Detail": ["detail oriented"],
+}
+
+# Lead-ins that do not change which skill is asked for ("Proficiency in Python" -> "Python")
+SKILL_PREFIXES = (
+    "proficiency in", "proficiency with", "proficient in", "knowledge of", "strong knowledge of", "experience with",
+    "experience in", "hands on experience with", "familiarity with", "expertise in", "understanding of",
+    "strong understanding of", "working knowledge of", "strong", "excellent", "advanced", "solid"
+)
+
+def normalize_label(label):
+    """Lowercase and reduce punctuation to single spaces ("Node.js" -> "node js", "C++" stays "c++")."""
+    label = label.lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^\w+#]+", " ", label).split())
+
+
+def build_index(taxonomy=TAXONOMY):
+    """Normalized name or alias -> canonical name."""
+    index = {}
+    for canonical, aliases in taxonomy.items():
+        for name in [canonical] + aliases:
+            index[normalize_label(name)] = canonical
+    return index
+
+
+ALIAS_INDEX = build_index()
+
+
+def strip_prefixes(normalized):
+    for prefix in SKILL_PREFIXES:
+        if normalized.startswith(prefix + " "):
+            return normalized[len(prefix) + 1:]
+    return normalized
+
+
+def canonical_skill(label, index=ALIAS_INDEX):
+    """Canonical taxonomy name of a skill label, or None when it is not in the taxonomy."""
+    normalized = normalize_label(label)
+    for candidate in (normalized, strip_prefixes(normalized)):
+        if candidate in index:
+            return index[candidate]
+    return None
+
+
+def listed_members(label, index=ALIAS_INDEX):
+    """Canonical names listed in parentheses: "Deep learning frameworks (TensorFlow, PyTorch)" -> {...}."""
+    members = set()
+    for group in re.findall(r"\(([^)]*)\)", label):
+        for part in re.split(r",|/|\bor\b|\band\b|\be\.g\.", group):
+            canonical = canonical_skill(part.strip(), index)
+            if canonical:
+                members.add(canonical)
+    return members
+
+
+def canonicalize_items(items, index=ALIAS_INDEX):
+    """Rename skills to their canonical name and merge duplicates, keeping the highest weight.
+
+    items are job_spec.parse_requirements items. Items only merge within the same category.
+    Skills resolve through the alias index; otherwise labels merge only when they are equal
+    once normalized and stripped of lead-ins ("Knowledge of SQL" / "SQL"). There is no
+    similarity matching: "Supervised" / "Unsupervised learning" or "SQL" / "NoSQL" stay apart.
+    An item listed inside another item's parentheses is merged into that item.
+    The first occurrence keeps its position.
+
+    Returns (items, merges) where merges lists (kept label, merged label) pairs.
+    """
+    kept = []
+    by_key = {}
+    merges = []
+
+    def merge(target, item):
+        target["weight"] = max(target["weight"], item["weight"])
+        merges.append((target["label"], item["original"]))
+
+    for item in items:
+        item = dict(item, original=item["label"])
+        canonical = canonical_skill(item["label"], index) if item["key"] == "skill" else None
+        if canonical:
+            item["label"] = canonical
+        key = (item["category"], item["key"], strip_prefixes(normalize_label(item["label"])))
+        target = by_key.get(key)
+        if target is not None:
+            merge(target, item)
+            continue
+        by_key[key] = item
+        kept.append(item)
+
+    # Umbrella items absorb the separate entries they already list in the same category
+    umbrellas = [(item, listed_members(item["label"], index)) for item in kept if "(" in item["label"]]
+    absorbed = set()
+    for item in kept:
+        umbrella = next(
+            (
+                u for u, members in umbrellas
+                if u is not item and u["category"] == item["category"] and item["key"] == "skill" and item["label"] in members
+            ),
+            None
+        )
+        if umbrella is not None:
+            merge(umbrella, item)
+            absorbed.add(id(item))
+    result = [{k: v for k, v in item.items() if k != "original"} for item in kept if id(item) not in absorbed]
+    return result, merges
+
+
+def canonicalize_requirements(requirements):
+    """Canonicalize a job_requirements.py requirements dict. Returns (requirements, report).
+
+    Every category of the input is kept, even when it is or becomes empty.
+    The report holds the item counts, the merges and both job texts as the download button writes them.
+    """
+    job_type, items = parse_requirements(json.dumps(requirements))
+    canonical_items, merges = canonicalize_items(items)
+    rebuilt = json.loads(requirements_to_job_text(job_type or requirements.get("job_type", ""), canonical_items))
+    canonical = dict(rebuilt, importance_weights={
+        category: rebuilt["importance_weights"].get(category, [])
+        for category in requirements.get("importance_weights") or {}
+    })
+    report = {
+        "items_before": len(items),
+        "items_after": len(canonical_items),
+        "merges": merges,
+        "job_text_before": json.dumps(requirements, indent=2),
+        "job_text_after": json.dumps(canonical, indent=2)
+    }
+    return canonical, report
+
+
+def prompt_token_savings(report, resume_texts, layout="resume_first"):
+    """Estimated match-prompt tokens saved for each resume text by the canonical job text."""
+    return [
+        estimate_tokens(build_match_prompt(text, report["job_text_before"], layout))
+        - estimate_tokens(build_match_prompt(text, report["job_text_after"], layout))
+        for text in resume_texts
+    ]